@@ -0,0 +1,164 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(III) Logic level abstraction.
+Vectorized moves over the batch of matrices at once.
+"""
+
+
+# System imports
+from typing import NamedTuple, Union
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import MOVE
+
+
+# --- BatchResult -------------------------------------------------------------
+
+class BatchResult(NamedTuple):
+    """Result of the moves over the batch of N matrices."""
+
+    # (N, rows, cols) matrices after the move
+    boards: np.ndarray
+    # (N,) score gained by each matrix
+    scores: np.ndarray
+    # (N,) indication of any changes made in each matrix
+    changed: np.ndarray
+    # (N, max_power + 1) number of merged tiles by their power
+    merges: np.ndarray
+
+
+# --- Vectorized operations ---------------------------------------------------
+# Operations are performed along the last axis, i.e. to the left side,
+# with the same orientation of matrices by flip/transpose as in Logic.
+
+def compress(lines: np.ndarray) -> np.ndarray:
+    """Compress tiles to the left side."""
+    order = np.argsort(lines == 0, axis=-1, kind='stable')
+    return np.take_along_axis(lines, order, axis=-1)
+
+
+def merge(lines: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge compressed tiles to the left direction.
+    Return merged lines and powers of merged tiles (0 for no merge)
+    in the cells of the left tile of each merged pair.
+    """
+
+    cols = lines.shape[-1]
+    index = np.arange(cols)
+
+    # tiles are merged pairwise from the left of each run of equal tiles:
+    # the 1st with the 2nd, the 3rd with the 4th and so on
+    is_run_start = np.ones(lines.shape, dtype=bool)
+    is_run_start[..., 1:] = lines[..., 1:] != lines[..., :-1]
+    run_start = np.maximum.accumulate(np.where(is_run_start, index, 0), axis=-1)
+    is_even = (index - run_start) % 2 == 0
+
+    left, right = lines[..., :-1], lines[..., 1:]
+    is_merged = (left == right) & (left != 0) & is_even[..., :-1]
+
+    result = lines.copy()
+    result[..., :-1] += is_merged
+    result[..., 1:][is_merged] = 0
+    powers = np.where(is_merged, left + 1, 0)
+
+    return result, powers
+
+
+def _orient(boards: np.ndarray, move: MOVE) -> np.ndarray:
+    """Orientation of matrices before the move."""
+    if move == MOVE.UP:
+        return boards.transpose(0, 2, 1)
+    elif move == MOVE.DOWN:
+        return boards.transpose(0, 2, 1)[..., ::-1]
+    elif move == MOVE.RIGHT:
+        return boards[..., ::-1]
+    elif move == MOVE.LEFT:
+        return boards
+    else:
+        raise ValueError(f"Unexpected move value: {move}")
+
+
+def _orient_back(boards: np.ndarray, move: MOVE) -> np.ndarray:
+    """Orientation of matrices back after the move."""
+    if move == MOVE.UP:
+        return boards.transpose(0, 2, 1)
+    elif move == MOVE.DOWN:
+        return boards[..., ::-1].transpose(0, 2, 1)
+    elif move == MOVE.RIGHT:
+        return boards[..., ::-1]
+    elif move == MOVE.LEFT:
+        return boards
+    else:
+        raise ValueError(f"Unexpected move value: {move}")
+
+
+def _as_move_values(moves: Union[MOVE, np.ndarray, list], number: int) -> np.ndarray:
+    """Converting single move or sequence of moves to array of MOVE values."""
+    if isinstance(moves, MOVE):
+        return np.full(number, moves.value)
+    if isinstance(moves, np.ndarray) and moves.dtype != object:
+        values = moves.astype(int)
+    else:
+        values = np.array([
+            move.value if isinstance(move, MOVE) else int(move)
+            for move in moves
+        ], dtype=int)
+    if values.shape != (number,):
+        raise ValueError(f"Expected {number} moves, got shape {values.shape}")
+    return values
+
+
+def move_boards(
+        boards: np.ndarray,
+        moves: Union[MOVE, np.ndarray, list],
+        max_power: int
+) -> BatchResult:
+    """
+    Perform the moves over the batch of matrices.
+
+    :param boards: (N, rows, cols) matrices of powers
+    :param moves: single MOVE for all matrices or N moves (MOVE or its values)
+    :param max_power: the largest power counted in merges histogram
+    """
+
+    if boards.ndim != 3:
+        raise ValueError(f"Expected (N, rows, cols) matrices, got shape {boards.shape}")
+
+    number = boards.shape[0]
+    move_values = _as_move_values(moves, number)
+
+    result = boards.copy()
+    scores = np.zeros(number, dtype=np.int64)
+    merges = np.zeros((number, max_power + 1), dtype=np.int64)
+
+    # matrices are grouped by move, not iterated one by one
+    for move in (MOVE.UP, MOVE.DOWN, MOVE.RIGHT, MOVE.LEFT):
+        selected = np.flatnonzero(move_values == move.value)
+        if not selected.size:
+            continue
+
+        # the move itself: compress → merge → compress again
+        lines = _orient(boards[selected], move)
+        lines, powers = merge(compress(lines))
+        lines = compress(lines)
+        result[selected] = _orient_back(lines, move)
+
+        is_merged = powers > 0
+        scores[selected] = np.where(is_merged, 2 ** powers.astype(np.int64), 0).sum(axis=(1, 2))
+        owners = np.broadcast_to(selected[:, None, None], powers.shape)
+        merges += np.bincount(
+            owners[is_merged] * (max_power + 1) + powers[is_merged],
+            minlength = number * (max_power + 1)
+        ).reshape(number, max_power + 1)
+
+    changed = (result != boards).any(axis=(1, 2))
+
+    return BatchResult(result, scores, changed, merges)
@@ -0,0 +1,9 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Benchmarks of the engine, animation and rendering, for development purposes.
+Run from the root of the project: python -m benchmarks --help
+"""
@@ -0,0 +1,84 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Running of benchmarks with results saved to json. Entry point.
+"""
+
+
+# System imports
+import argparse
+import json
+import platform
+from datetime import datetime, timezone
+from os import environ
+
+# rendering is measured without any display
+environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+# External imports
+import numpy as np
+import pygame as pg
+
+# Project imports
+from benchmarks import engine, animation, renderer
+from benchmarks.common import GRIDS, MIN_TIME
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+SUITES = {
+    'engine': engine.run,
+    'animation': animation.run,
+    'renderer': renderer.run,
+}
+
+
+def parse_grid(text: str) -> tuple[int, int]:
+    rows, _, cols = text.partition('x')
+    return int(rows), int(cols or rows)
+
+
+def parse_arguments() -> dict:
+    parser = argparse.ArgumentParser(description='Benchmarks of the engine, animation and rendering.')
+    parser.add_argument('--only', choices=SUITES, nargs='+', default=list(SUITES),
+                        help='suites to run, all by default')
+    parser.add_argument('--grids', type=parse_grid, nargs='+', default=list(GRIDS),
+                        help='grid sizes as ROWSxCOLS, e.g. 4x4 8x8')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME,
+                        help='minimal time in seconds for each benchmark')
+    parser.add_argument('--json', default=None, help='file to save the results to')
+    return vars(parser.parse_args())
+
+
+def main():
+    args = parse_arguments()
+
+    results = []
+    for suite in args['only']:
+        for result in SUITES[suite](args['grids'], args['min_time']):
+            print(', '.join(f'{key}: {value}' for key, value in result.items()))
+            results.append(result)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pygame': pg.version.ver,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'min_time': args['min_time'],
+        },
+        'results': results,
+    }
+    if args['json']:
+        with open(args['json'], 'w') as json_file:
+            json.dump(report, json_file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Benchmarks of the animation: starting and sliding of tiles.
+"""
+
+
+# Project imports
+from config import GAME, ENGINE, MOVE, PHASE
+from logic import Logic
+
+from benchmarks.common import GRIDS, MIN_TIME, MOVES, measure, random_boards, setup_grid
+
+
+# --- Animated moves ----------------------------------------------------------
+
+class AnimatedMoves:
+    """Making the moves over the mid-game boards, with tiles for animation."""
+
+    def __init__(self, rows: int, cols: int):
+        setup_grid(rows, cols)
+        GAME.ENGINE = ENGINE.TABLE
+        self.logic = Logic(GAME, seed=0)
+        self.tiles = self.logic.tiles
+        self.boards = random_boards(rows, cols)
+
+    def make_move(self, number: int):
+        """The board by the number, with the first move changing it and the new tile."""
+        self.logic.set_matrix(self.boards[number % len(self.boards)])
+        for move in MOVES[number % len(MOVES):] + MOVES[:number % len(MOVES)]:
+            if self.logic.move(move) is not MOVE.NONE:
+                break
+        self.logic.generate_new_tile(self.logic.choose_tile())
+
+    def next_frame(self, number: int):
+        """The next frame of animation, or the next animated move once finished."""
+        if self.tiles.phase == PHASE.FINISH:
+            self.make_move(number)
+            self.tiles.start_animation()
+        else:
+            self.tiles.next_animation()
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+def bench_start_animation(moves: AnimatedMoves, min_time: float, **params) -> dict:
+    """Tiles.start_animation right after the move."""
+    return measure(
+        'animation.start_animation',
+        lambda _: moves.tiles.start_animation(),
+        min_time,
+        moves.make_move,
+        **params
+    )
+
+
+def bench_next_animation(moves: AnimatedMoves, min_time: float, **params) -> dict:
+    """Tiles.next_animation for each frame of the moving and arising phases."""
+
+    def prepare(number: int):
+        if moves.tiles.phase == PHASE.FINISH:
+            moves.make_move(number)
+            moves.tiles.start_animation()
+
+    return measure(
+        'animation.next_animation',
+        lambda _: moves.tiles.next_animation(),
+        min_time,
+        prepare,
+        **params
+    )
+
+
+def run(grids=GRIDS, min_time: float = MIN_TIME) -> list[dict]:
+    """All the animation benchmarks for each grid size."""
+    results = []
+    for rows, cols in grids:
+        moves = AnimatedMoves(rows, cols)
+        params = {'grid': f'{rows}x{cols}'}
+        results.append(bench_start_animation(moves, min_time, **params))
+        results.append(bench_next_animation(moves, min_time, **params))
+    return results
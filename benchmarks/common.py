@@ -0,0 +1,140 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Common helpers of benchmarks: timing, boards and grid setup.
+"""
+
+
+# System imports
+from time import perf_counter
+from typing import Callable, Optional
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import GAME, SCREEN, MOVE
+from config import setting_up_the_display
+
+
+# --- Constants ---------------------------------------------------------------
+
+# grid sizes measured by default
+GRIDS = ((4, 4), (8, 8), (16, 16))
+
+# minimal time (in seconds) each benchmark is running for
+MIN_TIME = 0.5
+
+# number of prepared boards, cycled through by benchmarks
+BOARDS = 64
+
+MOVES = (MOVE.UP, MOVE.DOWN, MOVE.RIGHT, MOVE.LEFT)
+
+
+# --- Timing ------------------------------------------------------------------
+
+def measure(
+        name: str,
+        step: Callable[[int], None],
+        min_time: float = MIN_TIME,
+        prepare: Optional[Callable[[int], None]] = None,
+        **params
+) -> dict:
+    """
+    Calling the step with the growing call number until the min_time passes,
+    after the single call not measured (any lazy setup is done by it).
+    Return the result with the rate of calls per second.
+
+    :param name: name of the benchmark
+    :param step: single measured operation, taking the number of the call
+    :param prepare: called before each step with the same number, not measured
+    :param params: parameters of the benchmark, saved to the result
+    """
+
+    # warm-up
+    if prepare is not None:
+        prepare(0)
+    step(0)
+
+    calls = 0
+    batch = 1
+    elapsed = 0.0
+    while elapsed < min_time:
+        if prepare is None:
+            start = perf_counter()
+            for number in range(calls, calls + batch):
+                step(number)
+            elapsed += perf_counter() - start
+        else:
+            for number in range(calls, calls + batch):
+                prepare(number)
+                start = perf_counter()
+                step(number)
+                elapsed += perf_counter() - start
+        calls += batch
+        batch *= 2
+
+    return {
+        'name': name,
+        **params,
+        'calls': calls,
+        'seconds': round(elapsed, 6),
+        'per_second': round(calls / elapsed, 3),
+        'microseconds': round(elapsed / calls * 1e6, 3),
+    }
+
+
+# --- Boards ------------------------------------------------------------------
+
+def random_boards(
+        rows: int, cols: int,
+        number: int = BOARDS,
+        fill: float = 0.6,
+        seed: int = 0
+) -> list[np.ndarray]:
+    """
+    Boards of mid-game kind: the given fraction of cells is filled by
+    powers, which are larger towards the corner, as usual for the game.
+    """
+
+    rng = np.random.default_rng(seed)
+    max_power = min(rows * cols, 15)
+    boards = []
+    for _ in range(number):
+        powers = rng.integers(1, max_power, size=(rows, cols), endpoint=True)
+        powers = np.minimum(powers, rng.integers(1, 4, size=(rows, cols)) + np.add.outer(
+            np.arange(rows)[::-1], np.arange(cols)[::-1]
+        ))
+        board = np.where(rng.random((rows, cols)) < fill, powers, 0)
+        boards.append(board.astype(np.uint16))
+    return boards
+
+
+def full_boards(
+        rows: int, cols: int,
+        number: int = BOARDS,
+        empty: int = 1,
+        seed: int = 0
+) -> list[np.ndarray]:
+    """Boards with just the given number of empty cells."""
+
+    rng = np.random.default_rng(seed)
+    boards = []
+    for _ in range(number):
+        board = rng.integers(1, 12, size=rows * cols).astype(np.uint16)
+        board[rng.choice(rows * cols, size=empty, replace=False)] = 0
+        boards.append(board.reshape(rows, cols))
+    return boards
+
+
+# --- Grid setup --------------------------------------------------------------
+
+def setup_grid(rows: int, cols: int):
+    """Game and display constants for the grid size (display is recalculated)."""
+    GAME.ROWS, GAME.COLS = rows, cols
+    GAME.UNDO = 0
+    SCREEN.RESOLUTION = None
+    setting_up_the_display()
@@ -0,0 +1,92 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Benchmarks of the engine: moves, game over check and new tiles.
+"""
+
+
+# Project imports
+from config import GAME, ENGINE
+from logic import Logic
+import bitboard
+
+from benchmarks.common import GRIDS, MIN_TIME, MOVES, measure, random_boards, full_boards
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+def engines_for(rows: int, cols: int) -> list[ENGINE]:
+    """Engines supporting the grid size."""
+    return [
+        engine for engine in ENGINE
+        if engine != ENGINE.BITBOARD or (rows, cols) == (bitboard.SIZE, bitboard.SIZE)
+    ]
+
+
+def create_logic(rows: int, cols: int, engine: ENGINE) -> Logic:
+    GAME.ROWS, GAME.COLS = rows, cols
+    GAME.ENGINE = engine
+    GAME.UNDO = 0
+    return Logic(GAME, headless=True, seed=0)
+
+
+def bench_moves(logic: Logic, min_time: float, **params) -> list[dict]:
+    """Logic.up/down/right/left over the mid-game boards."""
+
+    boards = random_boards(logic.rows, logic.cols)
+    results = []
+    for move in MOVES:
+        method = getattr(logic, move.name.lower())
+
+        def prepare(number: int):
+            logic.matrix = boards[number % len(boards)].copy()
+
+        results.append(measure(
+            'engine.move', lambda _: method(), min_time, prepare,
+            move = move.name.lower(),
+            **params
+        ))
+    return results
+
+
+def bench_game_lost(logic: Logic, min_time: float, **params) -> dict:
+    """Logic.is_game_lost over the full boards, not cached."""
+
+    boards = full_boards(logic.rows, logic.cols, empty=0)
+
+    def step(number: int):
+        logic.matrix = boards[number % len(boards)]
+        logic.legal = None
+        logic.is_game_lost()
+
+    return measure('engine.is_game_lost', step, min_time, **params)
+
+
+def bench_new_tile(logic: Logic, min_time: float, **params) -> dict:
+    """Logic.generate_new_tile over the nearly full boards."""
+
+    boards = full_boards(logic.rows, logic.cols, empty=2)
+
+    def prepare(number: int):
+        logic.matrix = boards[number % len(boards)].copy()
+
+    def step(_):
+        logic.generate_new_tile(logic.choose_tile())
+
+    return measure('engine.generate_new_tile', step, min_time, prepare, **params)
+
+
+def run(grids=GRIDS, min_time: float = MIN_TIME) -> list[dict]:
+    """All the engine benchmarks for each grid size and engine."""
+    results = []
+    for rows, cols in grids:
+        for engine in engines_for(rows, cols):
+            logic = create_logic(rows, cols, engine)
+            params = {'grid': f'{rows}x{cols}', 'engine': engine.name.lower()}
+            results += bench_moves(logic, min_time, **params)
+            results.append(bench_game_lost(logic, min_time, **params))
+            results.append(bench_new_tile(logic, min_time, **params))
+    return results
@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Benchmarks of the rendering, under SDL dummy video driver (no display needed).
+"""
+
+
+# System imports
+from os import environ
+
+# External imports
+import pygame as pg
+
+# Project imports
+from config import SCREEN
+from graphics import Graphics
+
+from benchmarks.animation import AnimatedMoves
+from benchmarks.common import GRIDS, MIN_TIME, measure
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+def bench_animate_tiles(graphics: Graphics, moves: AnimatedMoves, min_time: float, **params) -> dict:
+    """Graphics.animate_tiles for each frame of animation."""
+    return measure(
+        'renderer.animate_tiles',
+        lambda _: graphics.animate_tiles(moves.tiles),
+        min_time,
+        moves.next_frame,
+        **params
+    )
+
+
+def bench_draw_grid(graphics: Graphics, moves: AnimatedMoves, min_time: float, **params) -> dict:
+    """Graphics.draw_grid for each new matrix, without animation."""
+    return measure(
+        'renderer.draw_grid',
+        lambda _: graphics.draw_grid(moves.logic.matrix),
+        min_time,
+        moves.make_move,
+        **params
+    )
+
+
+def run(grids=GRIDS, min_time: float = MIN_TIME) -> list[dict]:
+    """All the rendering benchmarks for each grid size."""
+    environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    results = []
+    for rows, cols in grids:
+        moves = AnimatedMoves(rows, cols)
+        graphics = Graphics(SCREEN.RESOLUTION)
+        params = {'grid': f'{rows}x{cols}', 'driver': pg.display.get_driver()}
+        results.append(bench_animate_tiles(graphics, moves, min_time, **params))
+        results.append(bench_draw_grid(graphics, moves, min_time, **params))
+        pg.quit()
+    return results
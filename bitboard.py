@@ -0,0 +1,359 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(III) Logic level abstraction.
+Bitboard engine: grid 4x4 packed into a single 64-bit integer.
+"""
+
+
+# System imports
+from functools import lru_cache
+from typing import Optional
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import MOVE
+from transitions import LRU_SIZE, Transition, transition_left, transition_right
+
+
+# --- Constants ---------------------------------------------------------------
+
+# the only supported grid size for the bitboard engine
+SIZE = 4
+
+# number of bits per cell, enough for a power of 2 up to 2 ** 15 = 32768
+CELL_BITS = 4
+CELL_MASK = 0xF
+
+# the largest power which still could be merged without overflow of the cell
+MAX_CELL = 15
+
+# number of bits per row of the grid
+ROW_BITS = SIZE * CELL_BITS
+ROW_MASK = 0xFFFF
+
+# bit offsets of each cell in the packed board
+#   ┌────┬────┬────┬────┐
+#   │  0 │  4 │  8 │ 12 │
+#   ├────┼────┼────┼────┤
+#   │ 16 │ 20 │ 24 │ 28 │
+#   ├────┼────┼────┼────┤
+#   │ 32 │ 36 │ 40 │ 44 │
+#   ├────┼────┼────┼────┤
+#   │ 48 │ 52 │ 56 │ 60 │
+#   └────┴────┴────┴────┘
+SHIFTS = np.arange(0, SIZE * ROW_BITS, CELL_BITS, dtype=np.uint64).reshape(SIZE, SIZE)
+
+# matrix is packed from its cells one per 16 bits, squeezed by halves
+# (see pack): shifts and masks of every step, cells are 4 bits at the end
+_SQUEEZE = (
+    (12, int('000000FF' * 8, 16)),
+    (24, int('000000000000FFFF' * 4, 16)),
+    (48, int('000000000000000000000000FFFFFFFF' * 2, 16)),
+    (96, (1 << SIZE * ROW_BITS) - 1),
+)
+
+# adding of the offset to the cells one per 16 bits overflows
+# the cells not less than MAX_CELL into their upper 12 bits
+_CELLS_OFFSET = int('0001' * SIZE * SIZE, 16) * (CELL_MASK + 1 - MAX_CELL)
+_CELLS_OVERFLOW = int('0001' * SIZE * SIZE, 16) * (0xFFFF ^ CELL_MASK)
+
+# bit offsets of the rows in the packed board
+_ROW_SHIFTS = tuple(range(0, SIZE * ROW_BITS, ROW_BITS))
+
+# the lowest bit of every cell in the packed board
+_CELLS_LOW = int('1' * SIZE * SIZE, 16)
+
+
+# --- Row lookup tables -------------------------------------------------------
+
+# every table is indexed by the 16-bit row and holds (resulting row, score
+# gained by merges, powers of the merged tiles) for moving left or right;
+# moving up or down uses the same tables over the transposed board
+_row_entries = {}
+
+# moves performed over the transposed board
+_TRANSPOSED = (MOVE.UP, MOVE.DOWN)
+
+# every table is indexed by the 16-bit row and holds flags of the moves
+# changing it: 1 for left (up over the transposed board) and 2 for right (down)
+_row_moves = []
+
+# legal moves by the flags of all rows (lower 2 bits) and all columns
+# (upper 2 bits), in order of Logic.legal_moves
+_LEGAL_MOVES = tuple(
+    tuple(move for move, flag in (
+        (MOVE.UP, 4), (MOVE.DOWN, 8), (MOVE.RIGHT, 2), (MOVE.LEFT, 1)
+    ) if flags & flag)
+    for flags in range(16)
+)
+
+# cells of every 16-bit row, for unpacking of boards by rows
+_ROW_CELLS = (
+    (np.arange(ROW_MASK + 1)[:, None] >> np.arange(0, ROW_BITS, CELL_BITS)) & CELL_MASK
+).astype(np.uint16)
+
+
+def _unpack_row(row: int) -> tuple[int, ...]:
+    return tuple((row >> (CELL_BITS * col)) & CELL_MASK for col in range(SIZE))
+
+
+def _compress_rows(cells: np.ndarray) -> np.ndarray:
+    """Tiles of each row moved to the left, keeping their order."""
+    return np.take_along_axis(cells, np.argsort(cells == 0, axis=1, kind='stable'), axis=1)
+
+
+def _slide_rows(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sliding all the rows to the left at once: compress → merge → compress.
+    Return resulting rows and powers of the merged tiles in order of merges
+    (0 for no merge), the same as transitions.slide_row does for single row.
+    """
+
+    cells = _compress_rows(cells)
+    merged = np.zeros_like(cells)
+    for col in range(SIZE - 1):
+        is_merged = (cells[:, col] != 0) & (cells[:, col] == cells[:, col + 1])
+        cells[is_merged, col] += 1
+        cells[is_merged, col + 1] = 0
+        merged[is_merged, col] = cells[is_merged, col]
+    return _compress_rows(cells), merged
+
+
+def prepare_tables():
+    """
+    Precalculating results of left and right moves for all possible rows,
+    by numpy over all the rows at once.
+    Called by Logic of the bitboard engine, otherwise on the first move.
+    """
+
+    if _row_entries:
+        return
+
+    offsets = np.arange(0, ROW_BITS, CELL_BITS)
+    cells = _ROW_CELLS.astype(np.int64)
+    flags = np.zeros(ROW_MASK + 1, dtype=np.int64)
+
+    for move, cells_oriented in (
+            (MOVE.LEFT, cells),
+            (MOVE.RIGHT, cells[:, ::-1])  # right move is the left one of the reversed row
+    ):
+        result, merged = _slide_rows(cells_oriented.copy())
+        if move == MOVE.RIGHT:
+            result = result[:, ::-1]
+
+        # merging of two cells with MAX_CELL overflows the row,
+        # such rows are never passed here (see pack_supported)
+        rows = (result << offsets).sum(axis=1) & ROW_MASK
+        scores = np.where(merged, 2 ** merged, 0).sum(axis=1)
+        merges = [tuple(filter(None, powers)) for powers in merged.tolist()]
+        _row_entries[move] = list(zip(rows.tolist(), scores.tolist(), merges))
+        flags |= np.where(rows != np.arange(ROW_MASK + 1), 1 if move == MOVE.LEFT else 2, 0)
+
+    _row_entries[MOVE.UP] = _row_entries[MOVE.LEFT]
+    _row_entries[MOVE.DOWN] = _row_entries[MOVE.RIGHT]
+    _row_moves.extend(flags.tolist())
+
+
+# --- Board conversions -------------------------------------------------------
+
+def pack(matrix: np.ndarray) -> int:
+    """Pack 4x4 matrix of powers into a 64-bit integer board."""
+
+    # cells one per 16 bits, squeezed by halves
+    board = int.from_bytes(matrix.astype('<u2', copy=False).tobytes(), 'little')
+    for shift, mask in _SQUEEZE:
+        board = (board | (board >> shift)) & mask
+    return board
+
+
+def pack_supported(matrix: np.ndarray) -> Optional[int]:
+    """
+    Pack 4x4 matrix of powers into a 64-bit integer board,
+    None if the matrix could not be moved by the bitboard engine.
+    """
+
+    if matrix.shape != (SIZE, SIZE):
+        return None
+    board = int.from_bytes(matrix.astype('<u2', copy=False).tobytes(), 'little')
+    if (board + _CELLS_OFFSET) & _CELLS_OVERFLOW:
+        return None  # some cell is not less than MAX_CELL
+    for shift, mask in _SQUEEZE:
+        board = (board | (board >> shift)) & mask
+    return board
+
+
+def unpack(board: int, dtype=np.uint16) -> np.ndarray:
+    """Unpack 64-bit integer board into 4x4 matrix of powers."""
+    rows = [(board >> shift) & ROW_MASK for shift in _ROW_SHIFTS]
+    return _ROW_CELLS.take(rows, axis=0).astype(dtype, copy=False)
+
+
+def transpose(board: int) -> int:
+    """
+    Transpose the packed board.
+    Swapping nibbles across diagonal, first in 2x2 blocks, then the blocks.
+    """
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def flip_rows(board: int) -> int:
+    """Flip the packed board vertically: reversing order of rows."""
+    board = ((board & 0x0000FFFF0000FFFF) << 16) | ((board >> 16) & 0x0000FFFF0000FFFF)
+    return ((board & 0x00000000FFFFFFFF) << 32) | (board >> 32)
+
+
+def flip_cols(board: int) -> int:
+    """Flip the packed board horizontally: reversing order of cells in each row."""
+    board = ((board & 0x0F0F0F0F0F0F0F0F) << 4) | ((board >> 4) & 0x0F0F0F0F0F0F0F0F)
+    return ((board & 0x00FF00FF00FF00FF) << 8) | ((board >> 8) & 0x00FF00FF00FF00FF)
+
+
+def is_supported(matrix: np.ndarray) -> bool:
+    """Checking if matrix could be moved by the bitboard engine."""
+    return pack_supported(matrix) is not None
+
+
+# --- Board cells -------------------------------------------------------------
+
+def is_supported_board(board: int) -> bool:
+    """Checking if the packed board could be moved: no cell is MAX_CELL."""
+    return not board & (board >> 1) & (board >> 2) & (board >> 3) & _CELLS_LOW
+
+
+def _indexes(cells: int) -> list[int]:
+    """Flat indexes of the cells marked by their lowest bits, in ascending order."""
+    result = []
+    while cells:
+        lowest = cells & -cells
+        result.append(lowest.bit_length() >> 2)
+        cells ^= lowest
+    return result
+
+
+def empty_cells(board: int) -> list[int]:
+    """Flat indexes of the empty cells, the same as np.flatnonzero(matrix == 0)."""
+    occupied = board | (board >> 1)
+    occupied |= occupied >> 2
+    return _indexes(~occupied & _CELLS_LOW)
+
+
+def changed_cells(board: int, board_new: int) -> tuple[list[int], list[int]]:
+    """Flat indexes of the cells changed between the boards and their values before."""
+    changed = board ^ board_new
+    changed |= changed >> 1
+    changed |= changed >> 2
+    cells = _indexes(changed & _CELLS_LOW)
+    return cells, [(board >> (CELL_BITS * cell)) & CELL_MASK for cell in cells]
+
+
+def set_cell(board: int, cell: int, value: int) -> int:
+    """The board with the cell (by flat index) set to the power not above CELL_MASK."""
+    shift = CELL_BITS * cell
+    return (board & ~(CELL_MASK << shift)) | (value << shift)
+
+
+# --- Moves -------------------------------------------------------------------
+
+def _orient(board: int, move: MOVE) -> tuple[int, MOVE]:
+    """
+    Up and down moves are the left and right moves over the transposed board.
+    Return the board to slide by rows and the row-wise direction.
+    """
+    if move == MOVE.UP:
+        return transpose(board), MOVE.LEFT
+    elif move == MOVE.DOWN:
+        return transpose(board), MOVE.RIGHT
+    elif move in (MOVE.LEFT, MOVE.RIGHT):
+        return board, move
+    else:
+        raise ValueError(f"Unexpected move value: {move}")
+
+
+def move_board(board: int, move: MOVE) -> tuple[int, int, list[int]]:
+    """
+    Perform the move over the packed board.
+    Return the new board, score gained and powers of all the tiles merged.
+    """
+
+    if not _row_entries:
+        prepare_tables()
+    entries = _row_entries.get(move)
+    if entries is None:
+        raise ValueError(f"Unexpected move value: {move}")
+    is_transposed = move in _TRANSPOSED
+    if is_transposed:
+        board = transpose(board)
+
+    result = score = 0
+    merges = []
+    for shift in _ROW_SHIFTS:
+        row, row_score, row_merges = entries[(board >> shift) & ROW_MASK]
+        result |= row << shift
+        if row_score:
+            score += row_score
+            merges += row_merges
+
+    if is_transposed:
+        result = transpose(result)
+
+    return result, score, merges
+
+
+def legal_moves(board: int) -> tuple[MOVE, ...]:
+    """Moves which would change the packed board."""
+
+    if not _row_entries:
+        prepare_tables()
+    transposed = transpose(board)
+    flags = 0
+    for shift in _ROW_SHIFTS:
+        flags |= _row_moves[(board >> shift) & ROW_MASK] | \
+            _row_moves[(transposed >> shift) & ROW_MASK] << 2
+    return _LEGAL_MOVES[flags]
+
+
+@lru_cache(maxsize=LRU_SIZE)
+def _row_transition(row: int, direction: MOVE) -> Transition:
+    transition_of = transition_left if direction == MOVE.LEFT else transition_right
+    return transition_of(_unpack_row(row))
+
+
+def move_plan(board: int, move: MOVE) -> tuple[list, list]:
+    """
+    Return list of (row, col, row_to, col_to)
+    for every tile changing its cell during the move
+    and list of (row, col, value) for every tile arising after merge.
+    """
+
+    oriented, direction = _orient(board, move)
+    is_transposed = move in _TRANSPOSED
+
+    moves = []
+    arisings = []
+    for line, shift in enumerate(_ROW_SHIFTS):
+        transition = _row_transition((oriented >> shift) & ROW_MASK, direction)
+        for index, index_to in transition.moves:
+            if is_transposed:
+                moves.append((index, line, index_to, line))
+            else:
+                moves.append((line, index, line, index_to))
+        for index, value in transition.arisings:
+            if is_transposed:
+                arisings.append((index, line, value))
+            else:
+                arisings.append((line, index, value))
+
+    return moves, arisings
@@ -0,0 +1,117 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(V) Control level abstraction.
+Building of the evaluation database from recorded games. Entry point.
+"""
+
+
+# System imports
+import argparse
+import json
+from collections import Counter
+from glob import glob
+from os import path
+from time import perf_counter
+from typing import Callable
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import GAME, EVALDB, NTUPLE
+from logic import Logic
+from recorder import GameReader
+from evaldb import EvalDatabase, pack_boards
+from ntuple import NTupleNetwork
+from players import BoardMoves, evaluate
+import bitboard
+
+EVALUATORS = ('heuristic', 'ntuple')
+
+
+# --- Building ----------------------------------------------------------------
+
+def count_boards(files: list[str]) -> Counter:
+    """Counting canonical keys of the boards reached by the moves of recorded games."""
+
+    GAME.ROWS = GAME.COLS = bitboard.SIZE
+    GAME.UNDO = 0
+    logic = Logic(GAME, headless=True)
+
+    counter = Counter()
+    for file in files:
+        reader = GameReader(file)
+        try:
+            if (reader.rows, reader.cols) != (bitboard.SIZE, bitboard.SIZE):
+                continue  # packed boards are 4x4 only
+            boards = [logic.matrix.copy() for _ in reader.replay(logic)]
+        finally:
+            reader.close()
+        if boards:
+            boards = np.array(boards)
+            boards = boards[boards.max(axis=(1, 2)) <= bitboard.CELL_MASK]  # packable only
+            counter.update(pack_boards(boards).tolist())
+    return counter
+
+
+def create_evaluator(name: str, weights: str) -> Callable[[np.ndarray], float]:
+    if name == 'heuristic':
+        return lambda matrix: evaluate(BoardMoves.from_matrix(matrix))
+    elif name == 'ntuple':
+        return NTupleNetwork.load(weights, bitboard.SIZE, bitboard.SIZE).value
+    else:
+        raise ValueError(f"Unexpected evaluator: {name}")
+
+
+def build(args: dict) -> dict:
+    """Adding the most common boards of the games, absent in the database yet."""
+
+    start = perf_counter()
+    files = sorted(glob(path.join(args['logs'], '*.bin')))
+    counter = count_boards(files)
+
+    database = EvalDatabase(args['database'])
+    evaluate = create_evaluator(args['evaluator'], args['weights'])
+
+    added = 0
+    for key, count in counter.most_common(args['top']):
+        if count < args['min_count']:
+            break
+        if database.lookup_packed(key) is None:
+            database.add_packed(key, evaluate(bitboard.unpack(key)))
+            added += 1
+    database.flush()
+
+    return {
+        'games': len(files),
+        'boards': len(counter),
+        'added': added,
+        'entries': len(database),
+        'seconds': round(perf_counter() - start, 3),
+    }
+
+
+# --- Main Program ------------------------------------------------------------
+
+def parse_args() -> dict:
+    parser = argparse.ArgumentParser(description='Building of the evaluation database from recorded games.')
+    parser.add_argument('--logs', required=True, help='directory of binary logs of games (e.g. by tournament)')
+    parser.add_argument('--database', default=EVALDB.FILE, help='.npy file of the database, extended if exists')
+    parser.add_argument('--top', type=int, default=EVALDB.TOP, help='number of the most common boards to add')
+    parser.add_argument('--min-count', type=int, default=EVALDB.MIN_COUNT,
+                        help='boards reached less times are not added')
+    parser.add_argument('--evaluator', choices=EVALUATORS, default='heuristic', help='evaluation of boards')
+    parser.add_argument('--weights', default=NTUPLE.WEIGHTS_FILE, help='weights of the ntuple evaluator')
+    return vars(parser.parse_args())
+
+
+def main():
+    print(json.dumps(build(parse_args()), indent=4))
+
+
+if __name__ == '__main__':
+    main()
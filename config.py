@@ -16,6 +16,27 @@ import json
 from enum import Enum, auto
 
 
+class ENGINE(Enum):
+    """Supported engines performing the moves over the matrix."""
+    MATRIX = auto()  # any grid size, numpy matrix, cell by cell
+    TABLE = auto()  # any grid size, numpy matrix, row by row lookup tables
+    BITBOARD = auto()  # grid 4x4 only, packed into 64-bit integer
+
+
+class PLAYER(Enum):
+    """Supported AI players (policies) for autoplay."""
+    RANDOM = auto()  # any of the possible moves
+    GREEDY = auto()  # the highest immediate score
+    EXPECTIMAX = auto()  # depth-limited expectimax search
+    MONTE_CARLO = auto()  # the best mean score of random playouts
+
+
+class ROLLOUT(Enum):
+    """Supported policies of the playouts for Monte Carlo player."""
+    RANDOM = auto()  # any of the possible moves
+    GREEDY = auto()  # the highest immediate score, ties at random
+
+
 @dataclass
 class GAME:
     """Set of constants for Game."""
@@ -25,7 +46,14 @@ class GAME:
     COLS = 4  # 2 <= COLS <= 16
 
     # number of available undo operations
-    UNDO = 10  # 0 <= UNDO <= 10
+    # (each one keeps just the cells changed by the move)
+    UNDO = 10  # 0 <= UNDO
+
+    # seed for generation of new tiles, None for unpredictable games
+    SEED = None
+
+    # engine performing the moves
+    ENGINE = ENGINE.TABLE  # ENGINE.BITBOARD is available for grid 4x4 only
 
 
 @dataclass
@@ -44,25 +72,24 @@ class TILE:
     PADDING = None  # will be calculated further
     SCALE = None  # will be calculated further
 
-    # with open(path.join('assets', 'TileColorsAlternative.json'), 'r') as json_file:
-    with open(path.join('assets', 'TileColors.json'), 'r') as json_file:
-        obj = json.load(json_file)
-    COLOR = {int(k): v for k, v in obj.items()}
+    # json assets of tile appearance ('...Alternative.json' ones are available)
+    COLOR_ASSET = 'TileColors.json'
+    FONT_COLOR_ASSET = 'TileFontColors.json'
+    FONT_SIZE_ASSET = 'TileFontSizes.json'
+    VALUE_ASSET = 'TileValues.json'
+    FONT_ASSET = 'ClearSansBold.ttf'
 
-    # with open(path.join('assets', 'TileFontColorsAlternative.json'), 'r') as json_file:
-    with open(path.join('assets', 'TileFontColors.json'), 'r') as json_file:
-        obj = json.load(json_file)
-    FONT_COLOR = {int(k): v for k, v in obj.items()}
+    # tile appearance, loaded from assets (see loading_the_assets)
+    COLOR = None  # will be loaded further
+    FONT_COLOR = None  # will be loaded further
+    FONT_SIZE_4x4 = None  # will be loaded further
+    VALUE = None  # will be loaded further
 
-    # with open(path.join('assets', 'TileFontSizesAlternative.json'), 'r') as json_file:
-    with open(path.join('assets', 'TileFontSizes.json'), 'r') as json_file:
-        obj = json.load(json_file)
-    FONT_SIZE_4x4 = {int(k): v for k, v in obj.items()}
+    # number of tiles in each row of the atlas surface with all the tiles
+    ATLAS_COLS = 16
 
-    # with open(path.join('assets', 'TileValuesAlternative.json'), 'r') as json_file:
-    with open(path.join('assets', 'TileValues.json'), 'r') as json_file:
-        obj = json.load(json_file)
-    VALUE = {int(k): v for k, v in obj.items()}
+    # directory to keep rendered atlases between launches, None for no cache
+    ATLAS_CACHE_DIR = 'cache'
 
 
 @dataclass
@@ -103,20 +130,15 @@ class SCREEN:
 
     FULL_SCREEN_MODE = False
 
-    # Actual display fullscreen resolution
-    # do not considering OS scale and layout:
-    # (thanks to solution by)
-    # https://gamedev.stackexchange.com/questions/105750/pygame-fullsreen-display-issue
-    import ctypes
-    ctypes.windll.user32.SetProcessDPIAware()
-    MONITOR_WIDTH = ctypes.windll.user32.GetSystemMetrics(0)
-    MONITOR_HEIGHT = ctypes.windll.user32.GetSystemMetrics(1)
+    # Actual display fullscreen resolution (see probing_the_monitor)
+    MONITOR_WIDTH = None  # will be calculated further
+    MONITOR_HEIGHT = None  # will be calculated further
 
     WIDTH_MIN = 590
     HEIGHT_MIN = 200
 
-    WIDTH_MAX = MONITOR_WIDTH if FULL_SCREEN_MODE else MONITOR_WIDTH - 100
-    HEIGHT_MAX = MONITOR_HEIGHT if FULL_SCREEN_MODE else MONITOR_HEIGHT - 100
+    WIDTH_MAX = None  # will be calculated further
+    HEIGHT_MAX = None  # will be calculated further
 
     # SCREEN dimensions
     WIDTH = None  # will be calculated further
@@ -139,13 +161,122 @@ class ANIMATION:
 
     IS_PRESENT = True
 
-    # frames per second
+    # frames per second (the upper limit, animation itself is driven by time)
     FPS = 60
 
     # how much time it takes (in seconds) for each of animation stage
     TIME_MOVING = 0.1
     TIME_ARISING = 0.1
 
+    # scale of arising tiles is rounded to this step
+    SCALE_STEP = 0.01
+
+    # the largest number of moves queued by input during animation
+    INPUT_QUEUE = 4
+
+    # the largest number of scaled tile surfaces kept for arising animation
+    SCALED_TILES_CACHE = 1024
+
+
+@dataclass
+class AI:
+    """Set of constants for AI player (autoplay)."""
+
+    # player of autoplay
+    PLAYER = PLAYER.EXPECTIMAX
+
+    # maximum depth of the search (in moves)
+    DEPTH = 3
+
+    # time budget (in seconds) for the search of each move
+    TIME_BUDGET = 0.1
+
+    # number of entries in the transposition table
+    TABLE_SIZE = 2 ** 18
+
+    # Monte Carlo player: the largest number of playouts for each move,
+    # made by batches (within the time budget), and their depth (in moves)
+    ROLLOUTS = 400
+    ROLLOUTS_BATCH = 50
+    ROLLOUT_DEPTH = 20
+    ROLLOUT_POLICY = ROLLOUT.RANDOM
+
+
+@dataclass
+class NTUPLE:
+    """Set of constants for N-tuple network evaluator and its training."""
+
+    # cells (row, col) of each tuple, looked up over all symmetries of the grid
+    TUPLES = (
+        ((0, 0), (0, 1), (0, 2), (0, 3), (1, 0), (1, 1)),
+        ((1, 0), (1, 1), (1, 2), (1, 3), (2, 0), (2, 1)),
+        ((0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)),
+        ((1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)),
+    )
+
+    # powers in cells are capped by BASE - 1, each tuple has BASE ** len weights
+    BASE = 16
+
+    # weights of the network, memory-mapped by evaluators
+    WEIGHTS_FILE = 'ntuple.npy'
+
+    # TD(0) step size, shared by all the weights looked up for the board
+    LEARNING_RATE = 0.1
+
+    # weights are saved once per this number of training games
+    CHECKPOINT_GAMES = 1000
+
+
+@dataclass
+class EVALDB:
+    """Set of constants for evaluation database of the most common boards."""
+
+    # table of the database, memory-mapped by lookups
+    FILE = 'evaldb.npy'
+
+    # number of the most common boards added by each building
+    TOP = 100_000
+
+    # boards reached less times in the recorded games are not added
+    MIN_COUNT = 2
+
+
+@dataclass
+class SERVER:
+    """Set of constants for game server of many concurrent sessions."""
+
+    HOST = '127.0.0.1'
+    PORT = 2048
+
+    # the largest number of sessions at once
+    MAX_SESSIONS = 100_000
+
+    # Logic instances of closed sessions kept for reuse by the new ones
+    POOL_SIZE = 1024
+
+    # sessions without requests for this time (in seconds) are closed
+    IDLE_TIMEOUT = 300.0
+    EVICT_INTERVAL = 10.0
+
+    # moves of all the sessions are made at once by the batch engine
+    IS_BATCHED = True
+
+
+@dataclass
+class PROFILER:
+    """Set of constants for Profiler of frame time (for development only)."""
+
+    IS_PRESENT = False
+
+    # number of the latest frames kept for the rolling percentiles
+    FRAMES = 1024
+
+    # overlay on the panel is refreshed once per this number of frames
+    OVERLAY_FRAMES = 30
+
+    # file to dump timings of the latest frames to on exit, None for no dump
+    CSV_FILE = None  # e.g. 'profile.csv'
+
 
 class MOVE(Enum):
     """Supported tile moves in the grid: up, down, right, left."""
@@ -156,6 +287,22 @@ class MOVE(Enum):
     LEFT = auto()
 
 
+class SYMMETRY(Enum):
+    """
+    Symmetries of the square grid: transposing (if any) goes first,
+    then flipping of rows and of columns (if any), as bit flags of the value.
+    Grid with rows != cols has just the first 4 of them.
+    """
+    IDENTITY = 0
+    FLIP_COLS = 1  # mirrored horizontally
+    FLIP_ROWS = 2  # mirrored vertically
+    ROTATE_180 = 3
+    TRANSPOSE = 4
+    ROTATE_CW = 5  # rotated 90 degrees clockwise
+    ROTATE_CCW = 6  # rotated 90 degrees counterclockwise
+    ANTI_TRANSPOSE = 7
+
+
 class PHASE(Enum):
     """Sequence of animation phases."""
     MOVING = auto()
@@ -164,6 +311,51 @@ class PHASE(Enum):
 
 
 # -----------------------------------------------------------------------------
+# Display and assets setup is not performed on import,
+# so the engine (Logic) could be used without any display at all.
+
+def loading_the_assets():
+    """Loading tile appearance for the TILE class from json assets."""
+
+    def load(file_name: str) -> dict:
+        with open(path.join('assets', file_name), 'r') as json_file:
+            obj = json.load(json_file)
+        return {int(k): v for k, v in obj.items()}
+
+    TILE.COLOR = load(TILE.COLOR_ASSET)
+    TILE.FONT_COLOR = load(TILE.FONT_COLOR_ASSET)
+    TILE.FONT_SIZE_4x4 = load(TILE.FONT_SIZE_ASSET)
+    TILE.VALUE = load(TILE.VALUE_ASSET)
+
+
+def probing_the_monitor():
+    """
+    Actual display fullscreen resolution
+    do not considering OS scale and layout:
+    (thanks to solution by)
+    https://gamedev.stackexchange.com/questions/105750/pygame-fullsreen-display-issue
+    """
+
+    try:
+        import ctypes
+        user32 = ctypes.windll.user32
+    except AttributeError:  # not Windows: asking SDL for the desktop size
+        import pygame as pg
+        pg.display.init()
+        info = pg.display.Info()
+        SCREEN.MONITOR_WIDTH, SCREEN.MONITOR_HEIGHT = info.current_w, info.current_h
+    else:
+        user32.SetProcessDPIAware()
+        SCREEN.MONITOR_WIDTH = user32.GetSystemMetrics(0)
+        SCREEN.MONITOR_HEIGHT = user32.GetSystemMetrics(1)
+
+    if SCREEN.FULL_SCREEN_MODE:
+        SCREEN.WIDTH_MAX = SCREEN.MONITOR_WIDTH
+        SCREEN.HEIGHT_MAX = SCREEN.MONITOR_HEIGHT
+    else:
+        SCREEN.WIDTH_MAX = SCREEN.MONITOR_WIDTH - 100
+        SCREEN.HEIGHT_MAX = SCREEN.MONITOR_HEIGHT - 100
+
 
 def calculating_the_scale_multiplier():
     """
@@ -237,6 +429,15 @@ def calculating_the_scale_multiplier():
     GRID.Y_TOP_LEFT = SCREEN.Y_TOP_LEFT + PANEL.HEIGHT
 
 
-# -----------------------------------------------------------------------------
+def setting_up_the_display():
+    """
+    Preparing all the constants needed for graphics and animation.
+    Should be called once before creating of any graphics or Tiles.
+    """
+
+    if SCREEN.RESOLUTION is not None:
+        return  # already done
 
-calculating_the_scale_multiplier()
+    loading_the_assets()
+    probing_the_monitor()
+    calculating_the_scale_multiplier()
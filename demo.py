@@ -9,16 +9,21 @@ Main program. Entry point.
 """
 
 
+# System imports
+from collections import deque
+
 # External imports
-import numpy as np
 import pygame as pg
 import pygame_gui as pgui
 
 # Project imports
-from config import GAME, PANEL, SCREEN, ANIMATION, MOVE
+from config import GAME, PANEL, SCREEN, ANIMATION, AI, PROFILER, MOVE, PHASE, PLAYER
+from config import setting_up_the_display
 from logic import Logic
+from players import Player, RandomPlayer, GreedyPlayer, ExpectimaxPlayer, MonteCarloPlayer
 from graphics import Graphics
 from gui import GUI
+from profiler import Profiler
 
 
 # --- Demo --------------------------------------------------------------------
@@ -30,23 +35,40 @@ class Demo:
         # Setup process
         self.is_running = True  # running main program flag
         self.is_mousemotion = False  # flag of the mouse pointer movement event
-        self.is_pause = False  # flag for pause in random self-gaming process
+        self.is_pause = True  # flag for pause in AI self-gaming process (autoplay)
         self.move = MOVE.NONE
 
+        # moves from keyboard, applied one per frame after the animation in progress
+        self.moves: deque[MOVE] = deque(maxlen=ANIMATION.INPUT_QUEUE)
+
         # Setup graphics
+        setting_up_the_display()
         self.logic = Logic(GAME)
         self.graphics = Graphics(SCREEN.RESOLUTION)
         self.gui = GUI(self.graphics.screen)
 
+        # Setup AI player for autoplay
+        self.player = self._create_player()
+
+        # Setup profiler of frame time (development only)
+        self.profiler = self._create_profiler() if PROFILER.IS_PRESENT else None
+
     # --- Handle methods ------------------------------------------------------
 
     def loop_handler(self):
         """Resetting flags. Ticking internal clock by FPS."""
         self.is_mousemotion = False
         self.move = MOVE.NONE
+        if self.profiler is not None:
+            self._profiler_handler()
         self.graphics.clock_tick()
         return self.is_running
 
+    def exit_handler(self):
+        """Finalizing the program after the main loop."""
+        if self.profiler is not None and PROFILER.CSV_FILE:
+            self.profiler.dump_csv(PROFILER.CSV_FILE)
+
     def events_handler(self):
         """Reacting to the events from mouse/keyboard or window manipulation."""
         for event in pg.event.get():
@@ -55,6 +77,8 @@ class Demo:
             if event.type == pg.QUIT:
                 self.is_running = False
                 break
+            if event.type in (pg.VIDEOEXPOSE, pg.WINDOWEXPOSED):
+                self.graphics.invalidate()
 
             # events from mouse
             if event.type == pg.MOUSEMOTION:
@@ -65,13 +89,13 @@ class Demo:
                 if event.key == pg.K_ESCAPE:
                     self.is_running = False
                 if event.key == pg.K_UP:
-                    self.move = self.logic.up()
+                    self.moves.append(MOVE.UP)
                 if event.key == pg.K_DOWN:
-                    self.move = self.logic.down()
+                    self.moves.append(MOVE.DOWN)
                 if event.key == pg.K_RIGHT:
-                    self.move = self.logic.right()
+                    self.moves.append(MOVE.RIGHT)
                 if event.key == pg.K_LEFT:
-                    self.move = self.logic.left()
+                    self.moves.append(MOVE.LEFT)
                 if event.key == pg.K_SPACE:
                     self.is_pause = not self.is_pause
                 if event.key == pg.K_BACKSPACE:
@@ -91,13 +115,16 @@ class Demo:
     def actions_handler(self):
         """Program actions in the main loop."""
 
-        # if not self.is_pause:
-        #     self.move = {
-        #         0: self.logic.up,
-        #         1: self.logic.down,
-        #         2: self.logic.right,
-        #         3: self.logic.left,
-        #     }.get(np.random.randint(4))()
+        # queued input: the animation in progress is fast-forwarded first
+        while self.moves and self.move is MOVE.NONE:
+            if ANIMATION.IS_PRESENT:
+                self.logic.tiles.fast_forward()
+            self.move = self.logic.move(self.moves.popleft())
+
+        # autoplay: the next move is chosen once the previous one is animated
+        if not self.is_pause and self.move is MOVE.NONE:
+            if not ANIMATION.IS_PRESENT or self.logic.tiles.phase == PHASE.FINISH:
+                self.move = self.logic.move(self.player.choose_move(self.logic))
 
         if self.move is not MOVE.NONE:
             if PANEL.IS_PRESENT:
@@ -109,15 +136,15 @@ class Demo:
                 self.gui.button_undo.show()
         else:
             if ANIMATION.IS_PRESENT:
-                self.logic.tiles.next_animation()
+                self.logic.tiles.next_animation(self.graphics.time_delta)
 
         if self.logic.is_game_lost():
             self.logic.game_lost_procedure()
             self.is_running = False
 
     def graphics_handler(self):
-        """Redrawing the screen."""
-        self.gui.draw()
+        """Redrawing the changed regions of the screen."""
+        self.graphics.add_dirty_rects(self.gui.draw())
         if ANIMATION.IS_PRESENT:
             self.graphics.animate_tiles(self.logic.tiles)
         else:
@@ -126,7 +153,39 @@ class Demo:
 
     # --- Other methods -------------------------------------------------------
 
+    @staticmethod
+    def _create_player() -> Player:
+        if AI.PLAYER == PLAYER.RANDOM:
+            return RandomPlayer()
+        elif AI.PLAYER == PLAYER.GREEDY:
+            return GreedyPlayer()
+        elif AI.PLAYER == PLAYER.EXPECTIMAX:
+            return ExpectimaxPlayer()
+        elif AI.PLAYER == PLAYER.MONTE_CARLO:
+            return MonteCarloPlayer()
+        else:
+            raise ValueError(f"Unexpected player: {AI.PLAYER}")
+
+    def _create_profiler(self) -> Profiler:
+        profiler = Profiler(('events', 'actions', 'graphics', 'move', 'animation', 'render'))
+        profiler.instrument(self, 'events_handler', 'events')
+        profiler.instrument(self, 'actions_handler', 'actions')
+        profiler.instrument(self, 'graphics_handler', 'graphics')
+        profiler.instrument(self.logic, '_move', 'move')
+        if self.logic.tiles is not None:
+            profiler.instrument(self.logic.tiles, 'next_animation', 'animation')
+        profiler.instrument(self.graphics, 'animate_tiles', 'render')
+        if PANEL.IS_PRESENT:
+            self.gui.create_profiler_overlay(len(profiler.sections))
+        return profiler
+
+    def _profiler_handler(self):
+        self.profiler.next_frame()
+        if PANEL.IS_PRESENT and self.profiler.frames % PROFILER.OVERLAY_FRAMES == 0:
+            self.gui.update_profiler(self.profiler.summary())
+
     def _event_undo(self):
+        self.moves.clear()
         self.logic.pop_from_history()
         if PANEL.IS_PRESENT:
             self.gui.update_score(self.logic.stats.score)
@@ -134,6 +193,7 @@ class Demo:
                 self.gui.button_undo.hide()
 
     def _event_new_game(self):
+        self.moves.clear()
         self.logic.new_game()
         if PANEL.IS_PRESENT:
             self.gui.update_score(self.logic.stats.score)
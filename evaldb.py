@@ -0,0 +1,159 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(I) Data level abstraction.
+Evaluation database: sorted table of packed 4x4 boards and their values,
+memory-mapped for zero-copy lookups shared by all the processes.
+"""
+
+
+# System imports
+from os import path, replace
+from typing import Optional
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import EVALDB, SYMMETRY
+import bitboard
+from symmetry import canonical_packed, transform
+
+
+# --- Format ------------------------------------------------------------------
+#
+#   .npy file with (2, N) array of uint64:
+#   ┌────────┬──────────────────────────────────────────────────────┐
+#   │ row 0  │ keys: canonical packed boards (see symmetry), sorted │
+#   │ row 1  │ values: float64, stored bit by bit as uint64         │
+#   └────────┴──────────────────────────────────────────────────────┘
+#   both rows are contiguous, so binary search reads the keys in place.
+
+KEY_TYPE = np.uint64
+VALUE_TYPE = np.float64
+
+
+def pack_boards(boards: np.ndarray) -> np.ndarray:
+    """Packing (N, 4, 4) matrices into N canonical packed boards at once."""
+    boards = np.asarray(boards).astype(KEY_TYPE)
+    variants = [
+        np.bitwise_or.reduce(transform(boards, symmetry) << bitboard.SHIFTS, axis=(1, 2))
+        for symmetry in SYMMETRY
+    ]
+    return np.minimum.reduce(variants)
+
+
+# --- EvalDatabase ------------------------------------------------------------
+
+class EvalDatabase:
+    """
+    Values of boards by their canonical keys, so all the symmetric boards
+    share the single entry. New entries are kept in memory until flush(),
+    which merges them into the table and replaces the file at once:
+    other processes keep reading the previous table until reload().
+    On Windows the mapped file could not be replaced, so flush() fails
+    while any other process keeps its map (see flush).
+    """
+
+    def __init__(self, file: str = EVALDB.FILE):
+        """:param file: .npy file of the table, created by the first flush()"""
+
+        self.file = file
+        self.keys = np.empty(0, dtype=KEY_TYPE)
+        self.values = np.empty(0, dtype=VALUE_TYPE)
+
+        # entries added, but not merged into the table yet
+        self.pending: dict[int, float] = dict()
+
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self.keys) + sum(1 for key in self.pending if self._find(key) is None)
+
+    def reload(self):
+        """Memory-mapping the latest table from the file (read-only)."""
+        if path.exists(self.file):
+            table = np.load(self.file, mmap_mode='r')
+            self.keys = table[0]
+            self.values = table[1].view(VALUE_TYPE)
+
+    # --- Lookups -------------------------------------------------------------
+
+    def _find(self, key: int) -> Optional[float]:
+        """Binary search of the key in the table."""
+        index = int(np.searchsorted(self.keys, KEY_TYPE(key)))
+        if index < len(self.keys) and self.keys[index] == key:
+            return float(self.values[index])
+        return None
+
+    def lookup_packed(self, board: int) -> Optional[float]:
+        """Value of the packed board (any of its symmetric ones), None if absent."""
+        key, _ = canonical_packed(board)
+        value = self.pending.get(key)
+        return value if value is not None else self._find(key)
+
+    def lookup(self, matrix: np.ndarray) -> Optional[float]:
+        """Value of the 4x4 matrix, None if absent."""
+        return self.lookup_packed(bitboard.pack(matrix))
+
+    def lookup_batch(self, boards: np.ndarray) -> np.ndarray:
+        """Values of (N, 4, 4) matrices at once, NaN for the absent ones."""
+
+        keys = pack_boards(boards)
+        index = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        result = np.full(len(keys), np.nan)
+        if len(self.keys):
+            is_found = self.keys[index] == keys
+            result[is_found] = self.values[index[is_found]]
+        if self.pending:
+            for number in np.flatnonzero(np.isnan(result)).tolist():
+                result[number] = self.pending.get(int(keys[number]), np.nan)
+        return result
+
+    # --- Additions -----------------------------------------------------------
+
+    def add_packed(self, board: int, value: float):
+        """Adding (or replacing) value of the packed board, pending until flush()."""
+        key, _ = canonical_packed(board)
+        self.pending[key] = value
+
+    def add(self, matrix: np.ndarray, value: float):
+        """Adding (or replacing) value of the 4x4 matrix, pending until flush()."""
+        self.add_packed(bitboard.pack(matrix), value)
+
+    def flush(self):
+        """
+        Merging pending entries into the table, saved to the file.
+        The own map of the file is released before the file is replaced,
+        maps of other processes are not: they keep the previous table,
+        and on Windows os.replace raises PermissionError until they close it.
+        """
+
+        if not self.pending:
+            return
+
+        keys = np.fromiter(self.pending.keys(), dtype=KEY_TYPE, count=len(self.pending))
+        values = np.fromiter(self.pending.values(), dtype=VALUE_TYPE, count=len(self.pending))
+
+        # pending entries go first, so they win over the same keys in the table
+        keys, index = np.unique(np.concatenate((keys, self.keys)), return_index=True)
+        values = np.concatenate((values, self.values))[index]
+
+        table = np.empty((2, len(keys)), dtype=KEY_TYPE)
+        table[0] = keys
+        table[1] = values.view(KEY_TYPE)
+
+        # the merged table is kept in memory while the file is replaced
+        self.keys = keys
+        self.values = values
+
+        file_tmp = self.file + '.tmp'
+        with open(file_tmp, 'wb') as table_file:
+            np.save(table_file, table)
+        replace(file_tmp, self.file)
+
+        self.pending.clear()
+        self.reload()
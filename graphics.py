@@ -10,7 +10,10 @@ Presentation, graphics & UI, provided by pygame & pygame_gui external modules.
 
 
 # System imports
-from os import environ, path
+from functools import lru_cache
+from hashlib import sha256
+from os import environ, makedirs, path, replace
+from typing import Optional
 
 # External imports
 import numpy as np
@@ -45,10 +48,32 @@ class Graphics:
         self.clock = pg.time.Clock()
         self.time_delta = None
 
-        # preparing surfaces of tiles
-        self.tile_surfaces = dict()
+        # dirty regions of the screen to be reflected on the display by show()
+        self.is_full_update = True
+        self.dirty_rects: list[pg.Rect] = []
+
+        # slots of tiles animated by the last frame and their rects
+        self.animated_slots = np.empty(0, dtype=np.int64)
+        self.animated_rects: list[pg.Rect] = []
+
+        # matrix drawn by the last frame without animation
+        self.matrix_drawn: Optional[np.ndarray] = None
+
+        # fonts loaded by their size
+        self.fonts: dict[int, pg.font.Font] = dict()
+
+        # preparing surfaces of tiles: the atlas with all the tiles,
+        # with rect of each tile in the atlas and subsurface of it
+        self.atlas: Optional[pg.Surface] = None
+        self.atlas_rects: dict[int, pg.Rect] = dict()
+        self.tile_surfaces: dict[int, pg.Surface] = dict()
         self.prepare_tiles()
 
+        # surfaces of tiles scaled for arising animation, made once
+        # for each (value, scale) pair and kept in the bounded cache
+        self.get_scaled_tile_surface = \
+            lru_cache(maxsize=ANIMATION.SCALED_TILES_CACHE)(self._scale_tile_surface)
+
         self.draw_screen_background()
         self.grid_background_surface_rect = self.draw_grid_background()
 
@@ -111,10 +136,25 @@ class Graphics:
         """Ticking clock. Also calculating time_delta for GUI elements."""
         self.time_delta = self.clock.tick(ANIMATION.FPS) / 1000.0
 
-    @staticmethod
-    def show():
-        """Reflecting all the drawings on the display."""
-        pg.display.flip()
+    def add_dirty_rects(self, rects: list[pg.Rect]):
+        """Marking regions of the screen, changed by the drawings."""
+        self.dirty_rects.extend(rects)
+
+    def invalidate(self):
+        """Marking the whole screen to be reflected on the display."""
+        self.is_full_update = True
+
+    def show(self):
+        """
+        Reflecting the drawings on the display:
+        just the dirty regions, nothing at all if the screen is unchanged.
+        """
+        if self.is_full_update:
+            pg.display.flip()
+        elif self.dirty_rects:
+            pg.display.update(self.dirty_rects)
+        self.is_full_update = False
+        self.dirty_rects = []
 
     # --- Grid drawings -------------------------------------------------------
 
@@ -150,24 +190,54 @@ class Graphics:
             result = TILE.VALUE[-1]
         return result
 
+    def get_font(self, size: int) -> pg.font.Font:
+        """Font of the given size, loaded once."""
+        if size not in self.fonts:
+            self.fonts[size] = pg.font.Font(
+                path.join('assets', TILE.FONT_ASSET),
+                size
+            )
+        return self.fonts[size]
+
     def prepare_tiles(self):
-        """Pre-drawing all possible tiles for the game."""
+        """
+        Pre-drawing all possible tiles for the game into the single atlas,
+        or loading the atlas rendered by the previous launch from the cache.
+        """
 
         tiles_list = [0] + [i + 1 for i in range((GAME.ROWS * GAME.COLS))]
-        for tile in tiles_list:
+        atlas_rows = (len(tiles_list) + TILE.ATLAS_COLS - 1) // TILE.ATLAS_COLS
+        atlas_size = (TILE.ATLAS_COLS * TILE.SIZE, atlas_rows * TILE.SIZE)
+
+        for index, tile in enumerate(tiles_list):
+            row, col = divmod(index, TILE.ATLAS_COLS)
+            self.atlas_rects[tile] = pg.Rect(col * TILE.SIZE, row * TILE.SIZE, TILE.SIZE, TILE.SIZE)
+
+        atlas_file = self.get_atlas_file(len(tiles_list))
+        self.atlas = self.load_atlas(atlas_file, atlas_size)
+        if self.atlas is None:
+            self.atlas = self.render_atlas(atlas_size)
+            self.save_atlas(atlas_file)
 
-            tile_surface = pg.Surface((TILE.SIZE, TILE.SIZE), pg.SRCALPHA)
-            tile_rect = tile_surface.get_rect()
+        for tile, tile_rect in self.atlas_rects.items():
+            self.tile_surfaces[tile] = self.atlas.subsurface(tile_rect)
+
+    def render_atlas(self, atlas_size: tuple[int, int]) -> pg.Surface:
+        """Rendering all the tiles into their rects of the atlas."""
+
+        atlas = pg.Surface(atlas_size, pg.SRCALPHA)
+
+        for tile, tile_rect in self.atlas_rects.items():
 
             pg.draw.rect(
-                surface = tile_surface,
+                surface = atlas,
                 color = self.get_tile_color(tile),
                 rect = tile_rect,
                 border_radius = 3
             )
 
             # pg.draw.rect(
-            #     surface = tile_surface,
+            #     surface = atlas,
             #     color = self.get_tile_font_color(tile),
             #     rect = tile_rect,
             #     width = 1,
@@ -175,60 +245,181 @@ class Graphics:
             # )
 
             if tile:
-                font = pg.font.Font(
-                    path.join('assets', 'ClearSansBold.ttf'),
-                    self.get_tile_font_size(tile)
-                )
+                font = self.get_font(self.get_tile_font_size(tile))
                 text = font.render(
                     self.get_tile_value(tile),
                     True,
                     self.get_tile_font_color(tile)
                 )
                 text_rect = text.get_rect()
-                text_rect.center = (TILE.SIZE // 2, TILE.SIZE // 2)
-                tile_surface.blit(text, text_rect)
+                text_rect.center = tile_rect.center
+                atlas.blit(text, text_rect)
+
+        return atlas
 
-            self.tile_surfaces[tile] = tile_surface
+    def _scale_tile_surface(self, value: int, scale: float) -> pg.Surface:
+        try:
+            tile_surface = self.tile_surfaces[value]
+        except KeyError:
+            raise KeyError(f"Can't find predefined tile surface"
+                           f" for the tile value: {value}")
+        return pg.transform.scale(
+            tile_surface,
+            (int(scale * TILE.SIZE), int(scale * TILE.SIZE))
+        )
 
     def draw_grid(self, matrix: np.ndarray):
-        """Drawing grid on the screen."""
+        """Drawing grid on the screen, if the matrix has changed."""
+
+        if self.matrix_drawn is not None and np.array_equal(matrix, self.matrix_drawn):
+            return
+        self.matrix_drawn = matrix.copy()
+
+        blit_sequence = []
+        for (row, col), value in np.ndenumerate(matrix):
+            try:
+                atlas_rect = self.atlas_rects[value]
+            except KeyError:
+                raise KeyError(f"Can't find predefined tile surface"
+                               f" for the matrix value: {value}")
+            blit_sequence.append((
+                self.atlas,
+                (
+                    GRID.X_TOP_LEFT + TILE.PADDING +
+                    col * (TILE.SIZE + TILE.PADDING),
+                    GRID.Y_TOP_LEFT + TILE.PADDING +
+                    row * (TILE.SIZE + TILE.PADDING)
+                ),
+                atlas_rect
+            ))
 
-        rows, cols = matrix.shape
-        for row in range(rows):
-            for col in range(cols):
+        self.screen.blits(blit_sequence, doreturn=False)
+        self.add_dirty_rects([self.grid_background_surface_rect[1]])
+
+    @staticmethod
+    def _tile_rects(tiles: Tiles, slots: np.ndarray) -> list[pg.Rect]:
+        """Rects of the whole cells, centered at the current coords of tiles."""
+        rects = []
+        for x, y in zip(tiles.x[slots].tolist(), tiles.y[slots].tolist()):
+            rect = pg.Rect(0, 0, TILE.SIZE, TILE.SIZE)
+            rect.center = (x, y)
+            rects.append(rect)
+        return rects
+
+    def _blit_tiles(self, tiles: Tiles, slots: np.ndarray):
+        """Drawing the tiles by slots, in a single batch of blits."""
+
+        blit_sequence = []
+        for value, x, y, scale in zip(
+                tiles.value[slots].tolist(),
+                tiles.x[slots].tolist(),
+                tiles.y[slots].tolist(),
+                tiles.scale[slots].tolist()
+        ):
+            if scale == 1:
                 try:
-                    tile_surface = self.tile_surfaces[matrix[row, col]]
+                    atlas_rect = self.atlas_rects[value]
                 except KeyError:
                     raise KeyError(f"Can't find predefined tile surface"
-                                   f" for the matrix value: {matrix[row, col]}")
-                tile_rect = tile_surface.get_rect()
-                tile_rect.center = (
-                    GRID.X_TOP_LEFT + TILE.PADDING + TILE.SIZE // 2 +
-                    col * (TILE.SIZE + TILE.PADDING),
-                    GRID.Y_TOP_LEFT + TILE.PADDING + TILE.SIZE // 2 +
-                    row * (TILE.SIZE + TILE.PADDING)
+                                   f" for the tile value: {value}")
+                blit_sequence.append((
+                    self.atlas,
+                    (x - TILE.SIZE // 2, y - TILE.SIZE // 2),
+                    atlas_rect
+                ))
+            else:
+                tile_surface = self.get_scaled_tile_surface(value, scale)
+                blit_sequence.append((tile_surface, tile_surface.get_rect(center=(x, y))))
+
+        self.screen.blits(blit_sequence, doreturn=False)
+
+    def animate_tiles(self, tiles: Tiles):
+        """
+        Animating tiles on the screen.
+        Just the regions of animated tiles are redrawn,
+        the whole grid only after any other changes of tiles.
+        """
+
+        grid_background_surface, grid_background_rect = self.grid_background_surface_rect
+        visible = np.flatnonzero(tiles.show)
+        animated = np.flatnonzero(tiles.moving | (tiles.arising & tiles.show))
+
+        if tiles.is_changed:
+            tiles.is_changed = False
+            self.screen.blit(grid_background_surface, grid_background_rect)
+            self._blit_tiles(tiles, visible)
+            self.add_dirty_rects([grid_background_rect])
+
+        else:
+            # regions of tiles animated by the last frame and by the current one
+            slots = np.union1d(self.animated_slots, animated)
+            rects = self.animated_rects + self._tile_rects(tiles, slots[tiles.used[slots]])
+            if not rects:
+                return
+
+            self.screen.blits([
+                (
+                    grid_background_surface,
+                    rect,
+                    rect.move(-grid_background_rect.left, -grid_background_rect.top)
                 )
+                for rect in rects
+            ], doreturn=False)
+            self._blit_tiles(tiles, np.array([
+                slot for slot, rect in zip(visible.tolist(), self._tile_rects(tiles, visible))
+                if rect.collidelist(rects) != -1
+            ], dtype=np.int64))
+            self.add_dirty_rects(rects)
 
-                self.screen.blit(tile_surface, tile_rect)
+        self.animated_slots = animated
+        self.animated_rects = self._tile_rects(tiles, animated)
 
-    def animate_tiles(self, tiles: Tiles):
-        """Animating tiles on the screen."""
+    # --- Atlas cache ---------------------------------------------------------
 
-        self.screen.blit(*self.grid_background_surface_rect)
+    @staticmethod
+    def get_atlas_file(tiles_number: int) -> Optional[str]:
+        """
+        Path to the cached atlas, keyed by hash of everything it depends on:
+        contents of the assets, size of tiles and their number in the atlas.
+        """
+
+        if TILE.ATLAS_CACHE_DIR is None:
+            return None
+
+        key = sha256()
+        for asset in (
+                TILE.COLOR_ASSET, TILE.FONT_COLOR_ASSET,
+                TILE.FONT_SIZE_ASSET, TILE.VALUE_ASSET,
+                TILE.FONT_ASSET
+        ):
+            with open(path.join('assets', asset), 'rb') as asset_file:
+                key.update(asset_file.read())
+        key.update(f'{TILE.SIZE} {TILE.ATLAS_COLS} {tiles_number} {pg.version.ver}'.encode())
+
+        return path.join(TILE.ATLAS_CACHE_DIR, f'atlas_{key.hexdigest()[:32]}.rgba')
 
-        for tile in tiles.tiles:
-            if tile.show:
-                try:
-                    tile_surface = self.tile_surfaces[tile.value]
-                except KeyError:
-                    raise KeyError(f"Can't find predefined tile surface"
-                                   f" for the tile value: {tile.value}")
-                if tile.scale != 1:
-                    tile_surface = pg.transform.scale(
-                        tile_surface,
-                        (tile.scale * TILE.SIZE, tile.scale * TILE.SIZE)
-                    )
-                tile_rect = tile_surface.get_rect()
-                tile_rect.center = (tile.x, tile.y)
-
-                self.screen.blit(tile_surface, tile_rect)
+    @staticmethod
+    def load_atlas(atlas_file: Optional[str], atlas_size: tuple[int, int]) -> Optional[pg.Surface]:
+        """Loading the atlas as raw RGBA pixels. Return None if not cached."""
+
+        if atlas_file is None or not path.isfile(atlas_file):
+            return None
+        with open(atlas_file, 'rb') as raw_file:
+            pixels = raw_file.read()
+        if len(pixels) != atlas_size[0] * atlas_size[1] * 4:
+            return None  # corrupted or stale file, to be rendered again
+
+        return pg.image.fromstring(pixels, atlas_size, 'RGBA')
+
+    def save_atlas(self, atlas_file: Optional[str]):
+        """Saving the atlas as raw RGBA pixels, if the cache is writable."""
+
+        if atlas_file is None:
+            return
+        try:
+            makedirs(path.dirname(atlas_file), exist_ok=True)
+            with open(atlas_file + '.tmp', 'wb') as raw_file:
+                raw_file.write(pg.image.tostring(self.atlas, 'RGBA'))
+            replace(atlas_file + '.tmp', atlas_file)
+        except OSError:
+            pass  # no cache, the atlas is rendered again next time
@@ -43,6 +43,10 @@ class GUI:
             enable_live_theme_updates = False
         )
 
+        # rects and pixels of UI elements, drawn by the last time
+        # (pixels are compared, since pygame_gui redraws images in place)
+        self.drawn: dict[pg.sprite.Sprite, tuple[pg.Rect, bytes]] = dict()
+
         self.panel_margins = {
             'top': 0,
             'left': 0,
@@ -56,9 +60,28 @@ class GUI:
             self.create_undo_button()
             self.create_new_game_button()
 
-    def draw(self):
-        """Drawing user interface to the screen surface."""
+    def draw(self) -> list[pg.Rect]:
+        """
+        Drawing user interface to the screen surface, if it has changed.
+        Return rects of all the UI elements drawn now and by the last time:
+        elements are blended over the screen as is, so redrawing of one
+        changes pixels of the ones under and above it as well.
+        """
+
+        root = self.manager.get_root_container()
+        visible = {
+            element: (element.rect.copy(), pg.image.tostring(element.image, 'RGBA'))
+            for element in self.manager.get_sprite_group().sprites()
+            if element.visible and element.image is not None and element is not root
+        }
+        if visible == self.drawn:
+            return []
+
+        rects = [rect for rect, _ in visible.values()] + \
+                [rect for rect, _ in self.drawn.values()]
         self.manager.draw_ui(self.screen)
+        self.drawn = visible
+        return rects
 
     # --- Defining UI Elements ------------------------------------------------
 
@@ -157,6 +180,34 @@ class GUI:
             container = self.panel
         )
 
+    def create_profiler_overlay(self, lines: int):
+        """Creating overlay with frame timings, over the title on the panel."""
+
+        self.panel_profiler = pgui.elements.UIPanel(
+            relative_rect = pg.Rect(8, 8, 246, 122),
+            starting_layer_height = 2,
+            manager = self.manager,
+            margins = self.panel_margins,
+            container = self.panel,
+            object_id = 'panel_profiler'
+        )
+
+        line_height = 120 // lines
+        self.labels_profiler = [
+            pgui.elements.UILabel(
+                relative_rect = pg.Rect(4, line * line_height, 238, line_height),
+                text = '',
+                manager = self.manager,
+                container = self.panel_profiler,
+                object_id = 'label_profiler'
+            )
+            for line in range(lines)
+        ]
+
+    def update_profiler(self, lines: list[str]):
+        for label, line in zip(self.labels_profiler, lines):
+            label.set_text(line)
+
     def create_confirmation_dialog(self):
         # TODO
 
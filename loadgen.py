@@ -0,0 +1,113 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(V) Control level abstraction.
+Load generator of many concurrent clients for the game server. Entry point.
+"""
+
+
+# System imports
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import SERVER
+from server import MOVES
+
+
+# --- Client ------------------------------------------------------------------
+
+class Client:
+    """Single connection to the server, playing random moves."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, seed: int):
+        self.reader, self.writer = reader, writer
+        self.rng = np.random.default_rng(seed)
+        self.request_id = 0
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    async def request(self, **request) -> dict:
+        self.request_id += 1
+        start = perf_counter()
+        self.writer.write(json.dumps({'id': self.request_id, **request}).encode() + b'\n')
+        response = json.loads(await self.reader.readline())
+        self.latencies.append(perf_counter() - start)
+        if not response['ok']:
+            self.errors += 1
+        return response
+
+    async def play(self, moves: int, undo_rate: float, seed: int):
+        """Playing the game by the random moves, starting new one once lost."""
+
+        state = await self.request(op='new_game', seed=seed)
+        session = state['session']
+        names = list(MOVES)
+        for _ in range(moves):
+            if state['lost']:
+                state = await self.request(op='new_game')
+                session = state['session']
+            elif self.rng.random() < undo_rate:
+                state = await self.request(op='undo', session=session)
+            else:
+                move = names[self.rng.integers(len(names))]
+                state = await self.request(op='move', session=session, move=move)
+        await self.request(op='state', session=session)
+
+
+async def run_client(args: dict, number: int) -> Client:
+    reader, writer = await asyncio.open_connection(args['host'], args['port'])
+    client = Client(reader, writer, args['seed'] + number)
+    try:
+        await client.play(args['moves'], args['undo_rate'], args['seed'] + number)
+    finally:
+        writer.close()
+    return client
+
+
+async def run(args: dict) -> dict:
+    """Running all the clients at once. Return summary of requests."""
+
+    start = perf_counter()
+    clients = await asyncio.gather(*(run_client(args, number) for number in range(args['clients'])))
+    seconds = perf_counter() - start
+
+    latencies = np.concatenate([client.latencies for client in clients]) * 1000
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)).tolist()
+    return {
+        'clients': len(clients),
+        'requests': len(latencies),
+        'errors': sum(client.errors for client in clients),
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(len(latencies) / seconds, 1),
+        'latency_ms': {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3)},
+    }
+
+
+# --- Main Program ------------------------------------------------------------
+
+def parse_args() -> dict:
+    parser = argparse.ArgumentParser(description='Load generator of many concurrent clients for the game server.')
+    parser.add_argument('--host', default=SERVER.HOST, help='host of the server')
+    parser.add_argument('--port', type=int, default=SERVER.PORT, help='port of the server')
+    parser.add_argument('--clients', type=int, default=1000, help='number of concurrent clients')
+    parser.add_argument('--moves', type=int, default=100, help='requests of each client')
+    parser.add_argument('--undo-rate', type=float, default=0.05, help='fraction of undo requests')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the clients and their games')
+    return vars(parser.parse_args())
+
+
+def main():
+    print(json.dumps(asyncio.run(run(parse_args())), indent=4))
+
+
+if __name__ == '__main__':
+    main()
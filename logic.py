@@ -11,15 +11,19 @@ Logic, primary purpose and calculations.
 
 # System imports
 from collections import deque
-from copy import copy
+from typing import Optional
 
 # External imports
 import numpy as np
 
 # Project imports
-from config import MOVE
-from stats import Stats
-from tiles import Tiles
+from config import MOVE, ENGINE
+from stats import Stats, MoveDelta
+from tiles import Tiles, MovePlan
+from transitions import get_row_transitions
+from batch import BatchResult, move_boards
+from recorder import GameRecorder, KEYFRAME_INTERVAL
+import bitboard
 
 # --- Constants and Additional classes ----------------------------------------
 
@@ -31,12 +35,27 @@ MAX_POWER = 32
 # default value: np.uint16 = 2 bytes
 MAX_POWER_TYPE = np.uint16
 
+# powers of newly generated tiles ('2' and '4') and their probabilities
+NEW_TILE_VALUES = (1, 2)
+NEW_TILE_PROBABILITIES = (0.9, 0.1)
+
+# number of random draws for new tiles, made at once
+# each new tile takes exactly one draw for its place and one for its value,
+# so the same seed and the same moves always give the same game
+SPAWN_BLOCK = 1024
+
 
 # --- Logic class --------------------------------------------------------------
 
 class Logic:
 
-    def __init__(self, game):
+    def __init__(self, game, headless: bool = False, seed=None):
+        """
+        :param game: set of constants for Game (see config.GAME)
+        :param headless: no tiles representation for animation at all,
+                         just the engine, e.g. for simulations
+        :param seed: seed for generation of new tiles, GAME.SEED by default
+        """
 
         # game matrix, which contains just base for power of '2'
         # but not the representative value itself
@@ -63,25 +82,100 @@ class Logic:
         #    matrix = [[9, 8, 7, 6], [2, 3, 4, 5], [1, 0, 0, 0], [0, 0, 0, 1]]
         self.cols = game.COLS
         self.rows = game.ROWS
+        # the matrix packed into 64-bit integer (see bitboard.pack), the state
+        # kept by the bitboard engine between its moves, None when not packed:
+        # the matrix is unpacked from it on demand and is not to be changed
+        # in place while the board is kept (see _release_board)
+        self.board: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None
         self.matrix = np.empty(
             shape = (self.rows, self.cols),
             dtype = MAX_POWER_TYPE
         )
 
+        # engine performing the moves
+        self.engine = game.ENGINE
+        if self.engine == ENGINE.BITBOARD and \
+                (self.rows, self.cols) != (bitboard.SIZE, bitboard.SIZE):
+            raise ValueError(f"Bitboard engine supports grid "
+                             f"{bitboard.SIZE}x{bitboard.SIZE} only, "
+                             f"got {self.rows}x{self.cols}")
+
+        # row lookup tables of the bitboard engine, ready before the first move
+        if self.engine == ENGINE.BITBOARD:
+            bitboard.prepare_tables()
+
+        # tables of row transitions for the table engine:
+        # rows for left/right moves and columns for up/down moves
+        if self.engine == ENGINE.TABLE:
+            max_power = self.rows * self.cols + 1
+            transitions_rows = get_row_transitions(self.cols, max_power)
+            transitions_cols = get_row_transitions(self.rows, max_power)
+            self.transitions = {
+                MOVE.UP: transitions_cols.left,
+                MOVE.DOWN: transitions_cols.right,
+                MOVE.RIGHT: transitions_rows.right,
+                MOVE.LEFT: transitions_rows.left,
+            }
+
         # game statistics
         self.stats = Stats(self.rows, self.cols)
 
         # game history for undo operation
         self.undo = game.UNDO
-        self.history_matrix = deque(maxlen=self.undo) if self.undo else None
-        self.history_stats = deque(maxlen=self.undo) if self.undo else None
+        self.history: Optional[deque[MoveDelta]] = deque(maxlen=self.undo) if self.undo else None
 
         # tiles representation as objects for animation
-        self.tiles = Tiles(self.rows, self.cols)
+        self.tiles: Optional[Tiles] = None if headless else Tiles(self.rows, self.cols)
+
+        # source cells of tiles, followed by the matrix engine during the move:
+        # flat indexes in the screen orientation of the tile and of the tile
+        # merged into it, -1 for none; None when no plan of the move is needed
+        self.origins: Optional[np.ndarray] = None
+
+        # random generator for new tiles
+        self.seed = None
+        self.rng: Optional[np.random.Generator] = None
+        self.spawn_draws: list[float] = []
+        self.spawn_index = 0
+        self.set_seed(seed if seed is not None else game.SEED)
+
+        # moves which would change the current matrix, calculated on demand,
+        # reset by every change of the matrix made by Logic itself
+        self.legal: Optional[tuple[MOVE, ...]] = None
+
+        # new tiles are saved to the latest move in history until the next move
+        self.is_history_open = False
+
+        # recorder of the game into binary log
+        self.recorder: Optional[GameRecorder] = None
 
         self.new_game()
         # self.test_matrix()
 
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = bitboard.unpack(self.board, MAX_POWER_TYPE)
+        return self._matrix
+
+    @matrix.setter
+    def matrix(self, matrix: np.ndarray):
+        self._matrix = matrix
+        self.board = None
+
+    def _supported_board(self) -> Optional[int]:
+        """The board to be moved by the bitboard engine, None if not supported."""
+        if self.board is None:
+            self.board = bitboard.pack_supported(self.matrix)
+            return self.board
+        return self.board if bitboard.is_supported_board(self.board) else None
+
+    def _release_board(self):
+        """The matrix becomes the only state, e.g. before changing it in place."""
+        if self.board is not None:
+            self.matrix = self.matrix
+
     # --- Matrix initialization methods ---------------------------------------
 
     def test_matrix(self):
@@ -95,8 +189,17 @@ class Logic:
         test_matrix = np.array(test_list).reshape((self.rows, self.cols))
         for y in range(1, test_matrix.shape[0], 2):
             test_matrix[y, :] = test_matrix[y, :][::-1]
-        self.matrix = test_matrix
-        self.tiles.copy_from_matrix(self.matrix)
+        self.set_matrix(test_matrix)
+
+    def set_matrix(self, matrix: np.ndarray, score: int = 0):
+        """Setting the matrix from outside, e.g. replaying the game."""
+        self.matrix = np.array(matrix, dtype=MAX_POWER_TYPE)
+        self.legal = None
+        self.stats.score = score
+        self.clear_history()  # moves saved before do not lead to this matrix
+        if self.tiles is not None:
+            self.tiles.copy_from_matrix(self.matrix)
+        self._record_keyframe()
 
     def clear_matrix(self):
         """Erase matrix by filling zeros."""
@@ -104,114 +207,221 @@ class Logic:
             shape = (self.rows, self.cols),
             dtype = MAX_POWER_TYPE
         )
+        self.legal = None
 
     def clear_tiles(self):
-        self.tiles.clear_tiles()
+        if self.tiles is not None:
+            self.tiles.clear_tiles()
 
     def clear_stats(self):
         """Erasing game statistics."""
         self.stats.reset(self.rows, self.cols)
 
-    def new_game(self):
-        """Initialize matrix with two new tiles in grid."""
+    def new_game(self, seed=None):
+        """
+        Initialize matrix with two new tiles in grid.
+        New seed (if any) restarts generation of new tiles.
+        """
+        if seed is not None:
+            self.set_seed(seed)
         self.clear_matrix()
         self.clear_tiles()
         self.clear_stats()
         self.clear_history()
+        self._record_keyframe()
         self.generate_new_tile()
         self.generate_new_tile()
 
+    def set_seed(self, seed=None):
+        """
+        Restarting random generator for new tiles.
+        The same seed gives the same stream of new tiles.
+        """
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.spawn_draws = []
+        self.spawn_index = 0
+
+    def _draw(self) -> float:
+        """Next random number in [0, 1) from pre-drawn block."""
+        if self.spawn_index >= len(self.spawn_draws):
+            self.spawn_draws = self.rng.random(SPAWN_BLOCK).tolist()
+            self.spawn_index = 0
+        self.spawn_index += 1
+        return self.spawn_draws[self.spawn_index - 1]
+
     def generate_new_tile(self, value=None):
         """Generate new tile on a random empty place in the matrix."""
-        if 0 in self.matrix:
-            while True:
-                row = np.random.randint(self.rows)
-                col = np.random.randint(self.cols)
-                if not self.matrix[row, col]:
-                    if value is not None:
-                        self.matrix[row, col] = value
-                        self.tiles.arise_tile(row, col, value)
-                    else:
-                        self.matrix[row, col] = 1
-                        self.tiles.new_tile(row, col, 1)
-                    break
+        if self.board is not None:
+            cells = bitboard.empty_cells(self.board)
+        else:
+            cells = np.flatnonzero(self.matrix == 0)
+        if len(cells):
+            row, col = divmod(int(cells[int(self._draw() * len(cells))]), self.cols)
+            self.place_tile(row, col, value)
 
-    @staticmethod
-    def choose_tile():
+    def place_tile(self, row: int, col: int, value=None):
+        """
+        Place new tile on the given place in the matrix.
+        Tile with the value is arising, without it is just '1' from the start.
+        """
+        self.legal = None
+        if value is not None:
+            self._set_cell(row, col, value)
+            if self.tiles is not None:
+                self.tiles.arise_tile(row, col, value)
+        else:
+            self._set_cell(row, col, value := 1)
+            if self.tiles is not None:
+                self.tiles.new_tile(row, col, 1)
+        if self.recorder is not None:
+            self.recorder.record_spawn(row, col, int(value))
+        if self.undo and self.is_history_open:
+            self.history[-1].spawns.append(row * self.cols + col)
+
+    def _set_cell(self, row: int, col: int, value: int):
+        """Setting the cell of the matrix, as well as of the board if kept."""
+        if self.board is not None and value > bitboard.CELL_MASK:
+            self._release_board()
+        if self.board is not None:
+            self.board = bitboard.set_cell(self.board, row * self.cols + col, value)
+            if self._matrix is not None:
+                self._matrix[row, col] = value
+        else:
+            self.matrix[row, col] = value
+
+    def choose_tile(self) -> int:
         """
         Return next generated tile
         with 90% probability of '1'
         and 10% probability of '2'.
         """
-        return np.random.choice([1, 2], p=[0.9, 0.1])
+        draw = self._draw()
+        for value, probability in zip(NEW_TILE_VALUES, NEW_TILE_PROBABILITIES):
+            if draw < probability:
+                return value
+            draw -= probability
+        return NEW_TILE_VALUES[-1]
 
     # --- History methods -----------------------------------------------------
 
-    def put_to_history(self, matrix, stats):
+    def put_to_history(self, delta: MoveDelta):
         """
         Saving to history of moves:
-        current state of matrix and statistics.
+        changes of matrix and statistics made by the move.
         """
         if self.undo:
-            self.history_matrix.append(matrix)
-            self.history_stats.append(stats)
+            self.history.append(delta)
 
     def pop_from_history(self) -> bool:
         """
         Retrieving from history of moves:
-        the most recent state of matrix and statistics.
+        reverting the most recent changes of matrix and statistics.
         """
         if self.undo:
-            if len(self.history_matrix):
-                self.matrix = self.history_matrix.pop()
-                self.tiles.copy_from_matrix(self.matrix)
-                self.stats = self.history_stats.pop()
+            if len(self.history):
+                self._release_board()
+                self.history.pop().revert(self.matrix, self.stats)
+                self.legal = None
+                self.is_history_open = False
+                if self.tiles is not None:
+                    self.tiles.copy_from_matrix(self.matrix)
+                self._record_keyframe()
                 return True
             else:
                 return False
 
     def is_history_there(self) -> bool:
         """
-        Checking if history stacks have any recently saved information.
+        Checking if history stack has any recently saved information.
         """
         if self.undo:
-            return bool(len(self.history_matrix))
+            return bool(len(self.history))
         else:
             return False
 
     def clear_history(self):
         """
-        Erasing history stacks.
+        Erasing history stack.
         """
         if self.undo:
-            self.history_matrix.clear()
-            self.history_stats.clear()
+            self.history.clear()
+            self.is_history_open = False
+
+    # --- Recording methods ---------------------------------------------------
+
+    def start_recording(self, file, keyframe_interval: int = KEYFRAME_INTERVAL):
+        """
+        Start recording the game into binary log (see recorder.GameRecorder),
+        beginning from the current state of matrix.
+        """
+        self.stop_recording()
+        self.recorder = GameRecorder(
+            file, self.rows, self.cols,
+            seed = self.seed if isinstance(self.seed, int) else None,
+            keyframe_interval = keyframe_interval
+        )
+        self._record_keyframe()
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def _record_keyframe(self):
+        if self.recorder is not None:
+            self.recorder.record_keyframe(self.matrix, self.stats.score)
 
     # --- Checking game state methods -----------------------------------------
 
-    def is_game_lost(self):
+    def legal_moves(self) -> tuple[MOVE, ...]:
         """
-        Checking state of the game when it reaches no possible continuation.
+        Moves which would change the matrix.
+        Calculated once for each state of the matrix.
         """
+        if self.legal is None:
+            self.legal = self._calculate_legal_moves()
+        return self.legal
 
-        # Step 1: Checking for any empty tile entries
-        if 0 in self.matrix:
-            return False
+    def is_move_legal(self, move: MOVE) -> bool:
+        return move in self.legal_moves()
 
-        # Step 2a: # Looking over horizontal paired tiles
-        for row in range(self.rows):
-            for col in range(self.cols - 1):
-                if self.matrix[row, col] == self.matrix[row, col + 1]:
-                    return False
+    def _calculate_legal_moves(self) -> tuple[MOVE, ...]:
+        """
+        The move is possible if any tile has an empty cell
+        or the same tile next to it in the direction of the move.
+        """
+
+        if self.board is not None:
+            return bitboard.legal_moves(self.board)
+
+        empty = self.matrix == 0
+        occupied = ~empty
 
-        # Step 2b: # Looking over vertical paired tiles
-        for col in range(self.cols):
-            for row in range(self.rows - 1):
-                if self.matrix[row, col] == self.matrix[row + 1, col]:
-                    return False
+        # Step 1: Looking over horizontal and vertical paired tiles
+        pairs_horizontal = bool(
+            ((self.matrix[:, :-1] == self.matrix[:, 1:]) & occupied[:, 1:]).any())
+        pairs_vertical = bool(
+            ((self.matrix[:-1, :] == self.matrix[1:, :]) & occupied[1:, :]).any())
 
-        # Otherwise it's really lost game
-        return True
+        # Step 2: Looking over empty cells next to the tiles
+        result = []
+        if pairs_vertical or (empty[:-1, :] & occupied[1:, :]).any():
+            result.append(MOVE.UP)
+        if pairs_vertical or (occupied[:-1, :] & empty[1:, :]).any():
+            result.append(MOVE.DOWN)
+        if pairs_horizontal or (occupied[:, :-1] & empty[:, 1:]).any():
+            result.append(MOVE.RIGHT)
+        if pairs_horizontal or (empty[:, :-1] & occupied[:, 1:]).any():
+            result.append(MOVE.LEFT)
+
+        return tuple(result)
+
+    def is_game_lost(self):
+        """
+        Checking state of the game when it reaches no possible continuation.
+        """
+        return not self.legal_moves()
 
     def game_lost_procedure(self):
         from pprint import pprint
@@ -240,7 +450,8 @@ class Logic:
         #   │ 8 │ 9 │ 10│ 11│          │ 11│ 10│ 9 │ 8 │
         #   └───┴───┴───┴───┘          └───┴───┴───┴───┘
         self.matrix = np.fliplr(self.matrix)
-        self.tiles.fliplr()
+        if self.origins is not None:
+            self.origins = np.fliplr(self.origins)
 
     def transpose_matrix(self):
         """
@@ -256,7 +467,8 @@ class Logic:
         #                                   │ 3 │ 7 │ 11│
         #                                   └───┴───┴───┘
         self.matrix = np.transpose(self.matrix)
-        self.tiles.transpose()
+        if self.origins is not None:
+            self.origins = np.transpose(self.origins, (1, 0, 2))
 
     def compress_tiles(self) -> bool:
         """
@@ -273,21 +485,25 @@ class Logic:
         #   │ 2 │ 2 │ 2 │ 2 │ 2 │               │ 2 │ 2 │ 2 │ 2 │ 2 │
         #   └───┴───┴───┴───┴───┘               └───┴───┴───┴───┴───┘
 
-        rows, cols = self.matrix.shape
-        matrix_new = np.zeros_like(self.matrix)
+        matrix = self.matrix
+        rows, cols = matrix.shape
+        matrix_new = np.zeros_like(matrix)
+        origins_new = None if self.origins is None else np.full_like(self.origins, -1)
         done = False
 
         for row in range(rows):
             col_new = 0
             for col in range(cols):
-                if self.matrix[row, col]:
-                    matrix_new[row, col_new] = self.matrix[row, col]
+                if matrix[row, col]:
+                    matrix_new[row, col_new] = matrix[row, col]
+                    if origins_new is not None:
+                        origins_new[row, col_new] = self.origins[row, col]
                     if col_new != col:
-                        self.tiles.move_tile(row, col, row, col_new)
                         done = True
                     col_new += 1
 
         self.matrix = matrix_new
+        self.origins = origins_new
         return done
 
     def merge_tiles(self) -> bool:
@@ -305,21 +521,23 @@ class Logic:
         #   │ 2 │ 2 │ 2 │ 2 │ 2 │               │ 4 │   │ 4 │   │ 2 │
         #   └───┴───┴───┴───┴───┘               └───┴───┴───┴───┴───┘
 
-        rows, cols = self.matrix.shape
+        matrix = self.matrix
+        rows, cols = matrix.shape
         done = False
 
         for row in range(rows):
             for col in range(cols - 1):
-                if self.matrix[row, col] and \
-                        self.matrix[row, col] == self.matrix[row, col + 1]:
-                    self.matrix[row, col] += 1
-                    self.matrix[row, col + 1] = 0
-                    self.tiles.move_tile(row, col + 1, row, col)
-                    self.tiles.arise_tile(row, col, int(self.matrix[row, col]))
+                if matrix[row, col] and \
+                        matrix[row, col] == matrix[row, col + 1]:
+                    matrix[row, col] += 1
+                    matrix[row, col + 1] = 0
+                    if self.origins is not None:
+                        self.origins[row, col, 1] = self.origins[row, col + 1, 0]
+                        self.origins[row, col + 1] = -1
                     done = True
 
-                    self.stats.score_incremental += 2 ** int(self.matrix[row, col])
-                    self.stats.merge[self.matrix[row, col]] += 1
+                    self.stats.score_incremental += 2 ** int(matrix[row, col])
+                    self.stats.merge_incremental.append(int(matrix[row, col]))
 
         return done
 
@@ -357,22 +575,154 @@ class Logic:
         """
         return self._move(MOVE.LEFT)
 
-    def _move(self, move: MOVE) -> MOVE:
+    def move(self, move: MOVE) -> MOVE:
+        """
+        Shift tiles in the grid by the given move.
+        Return type of MOVE as indication of any changes made.
+        """
+        if move == MOVE.NONE:
+            return MOVE.NONE
+        return self._move(move)
+
+    @staticmethod
+    def move_batch(boards: np.ndarray, moves) -> BatchResult:
+        """
+        Shift tiles in the batch of N grids at once, vectorized.
+        Moves might be a single MOVE or N moves, one per grid.
+        Return the new grids, score gained, changed mask and merges histogram
+        (number of merged tiles by power, the same as Stats.merge keys).
+        """
+        return move_boards(np.asarray(boards, dtype=MAX_POWER_TYPE), moves, MAX_POWER)
+
+    @staticmethod
+    def move_many(logics: list['Logic'], moves: list[MOVE]) -> list[MOVE]:
+        """
+        Shift tiles in many headless Logic instances of the same grid at once,
+        by the vectorized batch engine, with the same statistics and history
+        as by the move() of each one. Return type of MOVE for each one.
+        """
+
+        if any(logic.tiles is not None for logic in logics):
+            raise ValueError("Batch of moves is supported for headless Logic only")
+
+        # moves of nothing are made as they are, without the batch
+        selected = [index for index, move in enumerate(moves) if move != MOVE.NONE]
+        result = [MOVE.NONE] * len(logics)
+        if not selected:
+            return result
+
+        batch = Logic.move_batch(
+            np.array([logics[index].matrix for index in selected]),
+            [moves[index] for index in selected]
+        )
+        powers = np.arange(MAX_POWER + 1)
+        for number, index in enumerate(selected):
+            result[index] = logics[index]._move(moves[index], (
+                batch.boards[number],
+                int(batch.scores[number]),
+                np.repeat(powers, batch.merges[number]).tolist()
+            ))
+        return result
+
+    def _move(self, move: MOVE, batched: Optional[tuple[np.ndarray, int, list[int]]] = None) -> MOVE:
         """
         Internal wrapper for all four moves:
         up, down, right or left accordingly.
         Return type of MOVE as indication of any changes made.
+
+        :param batched: matrix, score and merges made by the batch engine
+                        (see move_many), the move itself is not performed then
         """
 
         # Step 1: preparation to the move
-        backup_matrix = copy(self.matrix)
-        backup_stats = copy(self.stats)
-        self.tiles.copy_from_matrix(self.matrix)
-        self.tiles.set_move(move)
-        done1 = done2 = done3 = False
+        if self.recorder is not None:
+            self.recorder.record_move(move, self.matrix, self.stats.score)
+        board = None
+        if batched is None and self.engine == ENGINE.BITBOARD:
+            board = self._supported_board()
+        # the bitboard engine keeps the board before the move instead,
+        # unpacking it only for the plan of the move
+        matrix_before = self.matrix if board is None or self.tiles is not None else None
+        moves_idle_before = self.stats.moves_idle
+        self.is_history_open = False
+        plan = None if self.tiles is None else MovePlan(move, [], [])
         self.stats.score_incremental = 0
+        self.stats.merge_incremental = []
+
+        # Step 2: the move itself by the chosen engine
+        # (bitboard one falls back to matrix one for the highest tiles)
+        if batched is not None:
+            done, merged = self._move_batched(*batched)
+        elif board is not None:
+            done, merged = self._move_bitboard(board, move, plan)
+        elif self.engine == ENGINE.TABLE:
+            done, merged = self._move_table(move, plan)
+        else:
+            self._release_board()
+            done, merged = self._move_matrix(move, plan)
+        if not merged:
+            self.stats.moves_idle += 1
+
+        # Step 3: operations after the move
+        self.stats.score += self.stats.score_incremental
+        for power in self.stats.merge_incremental:
+            self.stats.merge[power] += 1
+        if done:
+            self.legal = None
+            self.stats.move[move] += 1
+            if plan is not None:
+                self.tiles.set_plan(matrix_before, plan)
+            if self.undo:
+                if board is not None:
+                    cells, values = map(np.array, bitboard.changed_cells(board, self.board))
+                else:
+                    cells = np.flatnonzero(self.matrix != matrix_before)
+                    values = matrix_before.ravel()[cells]
+                self.put_to_history(MoveDelta(
+                    move = move,
+                    cells = cells,
+                    values = values,
+                    score = self.stats.score_incremental,
+                    merges = self.stats.merge_incremental,
+                    moves_idle = moves_idle_before
+                ))
+                self.is_history_open = True
+            result = move
+        else:
+            result = MOVE.NONE
+
+        return result
+
+    def _move_batched(self, matrix: np.ndarray, score: int, merges: list[int]) -> tuple[bool, bool]:
+        """
+        The move already performed by the batch engine, just taken over.
+        Return True/False as indication of any changes and any merges made.
+        """
+
+        if np.array_equal(matrix, self.matrix):
+            return False, False
+
+        self.stats.score_incremental += score
+        self.stats.merge_incremental.extend(merges)
+        self.matrix = matrix.copy()
+        return True, bool(merges)
+
+    def _move_matrix(self, move: MOVE, plan: Optional[MovePlan] = None) -> tuple[bool, bool]:
+        """
+        The move performed over the numpy matrix.
+        Return True/False as indication of any changes and any merges made.
+        """
+
+        done1 = done2 = done3 = False
 
-        # Step 2: orientation of the matrix before the move
+        # source cells are followed only if the plan of the move is needed
+        if plan is not None:
+            self.origins = np.full((self.rows, self.cols, 2), -1)
+            self.origins[..., 0] = np.where(
+                self.matrix, np.arange(self.matrix.size).reshape(self.matrix.shape), -1
+            )
+
+        # Step 1: orientation of the matrix before the move
         if move == MOVE.UP:
             self.transpose_matrix()
         elif move == MOVE.DOWN:
@@ -383,15 +733,13 @@ class Logic:
         elif move == MOVE.LEFT:
             pass  # no matrix transformations
 
-        # Step 3: the move itself
+        # Step 2: compress → merge → compress again
         done1 = self.compress_tiles()
         done2 = self.merge_tiles()
         if done2:
             done3 = self.compress_tiles()
-        else:
-            self.stats.moves_idle += 1
 
-        # Step 4: orientation of the matrix back after the move
+        # Step 3: orientation of the matrix back after the move
         if move == MOVE.UP:
             self.transpose_matrix()
         elif move == MOVE.DOWN:
@@ -402,14 +750,84 @@ class Logic:
         elif move == MOVE.LEFT:
             pass  # no matrix transformations
 
-        # Step 5: operations after the move
-        done = done1 or done2 or done3
-        self.stats.score += self.stats.score_incremental
-        if done:
-            self.stats.move[move] += 1
-            self.put_to_history(backup_matrix, backup_stats)
-            result = move
-        else:
-            result = MOVE.NONE
+        # Step 4: the plan of the move from the source cells
+        if plan is not None:
+            for row, col in zip(*np.nonzero(self.matrix)):
+                row, col = int(row), int(col)
+                origin, origin_merged = self.origins[row, col].tolist()
+                if origin != row * self.cols + col:
+                    plan.moves.append((*divmod(origin, self.cols), row, col))
+                if origin_merged >= 0:
+                    plan.moves.append((*divmod(origin_merged, self.cols), row, col))
+                    plan.arisings.append((row, col, int(self.matrix[row, col])))
+            self.origins = None
+
+        return done1 or done2 or done3, done2
+
+    def _move_table(self, move: MOVE, plan: Optional[MovePlan] = None) -> tuple[bool, bool]:
+        """
+        The move performed over the numpy matrix row by row,
+        using precalculated row transitions.
+        Return True/False as indication of any changes and any merges made.
+        """
 
-        return result
+        # lines to slide are rows for left/right moves and columns for up/down
+        is_transposed = move in (MOVE.UP, MOVE.DOWN)
+        lines = self.matrix.T if is_transposed else self.matrix
+        lines_new = np.empty_like(lines)
+        transition_of = self.transitions[move]
+        done = merged = False
+
+        for line, cells in enumerate(lines.tolist()):
+            transition = transition_of(tuple(cells))
+            lines_new[line] = transition.row
+            if not transition.changed:
+                continue
+            done = True
+
+            if transition.merges:
+                merged = True
+                self.stats.score_incremental += transition.score
+                self.stats.merge_incremental.extend(transition.merges)
+
+            if plan is None:
+                continue
+            if is_transposed:
+                for index, index_to in transition.moves:
+                    plan.moves.append((index, line, index_to, line))
+                for index, value in transition.arisings:
+                    plan.arisings.append((index, line, value))
+            else:
+                for index, index_to in transition.moves:
+                    plan.moves.append((line, index, line, index_to))
+                for index, value in transition.arisings:
+                    plan.arisings.append((line, index, value))
+
+        self.matrix = np.ascontiguousarray(lines_new.T) if is_transposed else lines_new
+        return done, merged
+
+    def _move_bitboard(self, board: int, move: MOVE, plan: Optional[MovePlan] = None) -> tuple[bool, bool]:
+        """
+        The move performed over the matrix packed into 64-bit integer,
+        using precalculated row lookup tables.
+        Return True/False as indication of any changes and any merges made.
+
+        :param board: the matrix packed (see bitboard.pack_supported)
+        """
+
+        board_new, score, merges = bitboard.move_board(board, move)
+        if board_new == board:
+            return False, False
+
+        self.stats.score_incremental += score
+        self.stats.merge_incremental.extend(merges)
+
+        if plan is not None:
+            moves, arisings = bitboard.move_plan(board, move)
+            plan.moves.extend(moves)
+            plan.arisings.extend(arisings)
+
+        # the matrix is unpacked from the new board on demand
+        self.board = board_new
+        self._matrix = None
+        return True, bool(merges)
@@ -21,6 +21,7 @@ def main():
         demo.events_handler()
         demo.actions_handler()
         demo.graphics_handler()
+    demo.exit_handler()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(III) Logic level abstraction.
+N-tuple network: value of the board as the sum of weights looked up
+by the powers in cells of each tuple, over all symmetries of the grid.
+"""
+
+
+# System imports
+from os import replace
+from typing import Optional
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import NTUPLE, MOVE
+from logic import Logic
+from symmetry import symmetries_of, transform
+
+
+# --- Constants ---------------------------------------------------------------
+
+WEIGHTS_TYPE = np.float32
+
+# all the moves could be chosen by the network
+MOVES = (MOVE.UP, MOVE.DOWN, MOVE.RIGHT, MOVE.LEFT)
+
+# tuple of cells (row, col)
+Tuple = tuple[tuple[int, int], ...]
+
+
+# --- NTupleNetwork -----------------------------------------------------------
+
+class NTupleNetwork:
+    """
+    Weights of all the tuples in the single flat array, table after table.
+    Each tuple is looked up under each symmetry of the grid,
+    so all the boards symmetric to each other have the same value.
+    """
+
+    def __init__(
+            self,
+            rows: int, cols: int,
+            tuples: tuple[Tuple, ...] = NTUPLE.TUPLES,
+            base: int = NTUPLE.BASE,
+            weights: Optional[np.ndarray] = None
+    ):
+        """
+        :param tuples: cells (row, col) of each tuple
+        :param base: powers in cells are capped by base - 1
+        :param weights: flat array of weights (e.g. memory-mapped), zeros if None
+        """
+
+        for cells in tuples:
+            if not all(0 <= row < rows and 0 <= col < cols for row, col in cells):
+                raise ValueError(f"Tuple {cells} is out of the grid {rows}x{cols}")
+
+        self.rows, self.cols = rows, cols
+        self.tuples = tuples
+        self.base = base
+
+        # flat indexes of cells of each tuple under each symmetry:
+        # [tuple, symmetry, cell], shorter tuples are padded by the cell 0
+        length = max(map(len, tuples))
+        grids = [
+            transform(np.arange(rows * cols).reshape(rows, cols), symmetry).ravel()
+            for symmetry in symmetries_of(rows, cols)
+        ]
+        self.cells = np.zeros((len(tuples), len(grids), length), dtype=np.intp)
+        for index, cells in enumerate(tuples):
+            flat = [row * cols + col for row, col in cells]
+            self.cells[index, :, :len(cells)] = [grid[flat] for grid in grids]
+
+        # weight of each cell in the index of the table, 0 for padding
+        self.multipliers = np.zeros((len(tuples), length), dtype=np.intp)
+        for index, cells in enumerate(tuples):
+            self.multipliers[index, :len(cells)] = base ** np.arange(len(cells))
+
+        # offset of the table of each tuple in the flat array of weights
+        sizes = [base ** len(cells) for cells in tuples]
+        self.offsets = np.cumsum([0] + sizes[:-1]).astype(np.intp)
+        self.size = sum(sizes)
+
+        if weights is None:
+            weights = np.zeros(self.size, dtype=WEIGHTS_TYPE)
+        if weights.shape != (self.size,) or weights.dtype != WEIGHTS_TYPE:
+            raise ValueError(f"Expected {self.size} weights of {np.dtype(WEIGHTS_TYPE)}, "
+                             f"got {weights.shape} of {weights.dtype}")
+        self.weights = weights
+
+    # --- Weights file --------------------------------------------------------
+
+    @classmethod
+    def load(cls, file: str, rows: int, cols: int, mode: str = 'r', **kwargs) -> 'NTupleNetwork':
+        """
+        Network with the weights memory-mapped from .npy file:
+        read-only by default, so all the processes share the single copy.
+        """
+        return cls(rows, cols, weights=np.load(file, mmap_mode=mode), **kwargs)
+
+    def save(self, file: str):
+        """Saving the weights, replacing the file at once for its readers."""
+        file_tmp = file + '.tmp'
+        with open(file_tmp, 'wb') as weights_file:
+            np.save(weights_file, self.weights)
+        replace(file_tmp, file)
+
+    # --- Evaluation ----------------------------------------------------------
+
+    def features(self, boards: np.ndarray) -> np.ndarray:
+        """Indexes of weights for (N, rows, cols) boards: [board, tuple, symmetry]."""
+        powers = np.minimum(boards.reshape(len(boards), -1), self.base - 1).astype(np.intp)
+        return (powers[:, self.cells] * self.multipliers[:, None, :]).sum(axis=-1) + \
+            self.offsets[:, None]
+
+    def evaluate(self, boards: np.ndarray) -> np.ndarray:
+        """Values of (N, rows, cols) boards."""
+        return self.weights[self.features(boards)].sum(axis=(1, 2), dtype=np.float64)
+
+    def value(self, matrix: np.ndarray) -> float:
+        """Value of the single board."""
+        return float(self.evaluate(matrix[None])[0])
+
+    def update(self, features: np.ndarray, delta: float, learning_rate: float = NTUPLE.LEARNING_RATE):
+        """Moving the value of the board by features towards the delta."""
+        np.add.at(self.weights, features.ravel(), learning_rate * delta / features.size)
+
+    def choose_move(self, matrix: np.ndarray) -> tuple[MOVE, Optional[np.ndarray], int]:
+        """
+        Return the move with the best score plus value of the board after it,
+        the board itself (afterstate, before the new tile) and the score.
+        MOVE.NONE if there are no possible moves.
+        """
+
+        result = Logic.move_batch(np.repeat(matrix[None], len(MOVES), axis=0), list(MOVES))
+        if not result.changed.any():
+            return MOVE.NONE, None, 0
+
+        values = result.scores + self.evaluate(result.boards)
+        values[~result.changed] = -np.inf
+        best = int(np.argmax(values))
+        return MOVES[best], result.boards[best], int(result.scores[best])
@@ -0,0 +1,438 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(III) Logic level abstraction.
+AI players, choosing the moves on their own for autoplay.
+"""
+
+
+# System imports
+from functools import lru_cache
+from time import perf_counter
+from typing import Optional
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import AI, MOVE, ROLLOUT
+from logic import Logic, NEW_TILE_VALUES, NEW_TILE_PROBABILITIES
+from transitions import get_row_transitions
+
+# --- Constants ---------------------------------------------------------------
+
+# the search board is a tuple of rows, each row is a tuple of powers
+Board = tuple[tuple[int, ...], ...]
+
+# all the moves could be chosen by players
+MOVES = (MOVE.UP, MOVE.DOWN, MOVE.RIGHT, MOVE.LEFT)
+
+# heuristic weights of the single row (or column) evaluation
+SCORE_LOST_PENALTY = 200_000.0
+SCORE_MONOTONICITY_POWER = 4.0
+SCORE_MONOTONICITY_WEIGHT = 47.0
+SCORE_SUM_POWER = 3.5
+SCORE_SUM_WEIGHT = 11.0
+SCORE_MERGES_WEIGHT = 700.0
+SCORE_EMPTY_WEIGHT = 270.0
+
+# spawns with lower cumulative probability are not searched deeper
+PROBABILITY_MIN = 0.0001
+
+
+# --- Board operations --------------------------------------------------------
+
+class BoardMoves:
+    """Moves over the search board, using precalculated row transitions."""
+
+    def __init__(self, rows: int, cols: int):
+        self.rows, self.cols = rows, cols
+        max_power = rows * cols + 1
+        transitions_rows = get_row_transitions(cols, max_power)
+        transitions_cols = get_row_transitions(rows, max_power)
+        self.transitions = {
+            MOVE.UP: transitions_cols.left,
+            MOVE.DOWN: transitions_cols.right,
+            MOVE.RIGHT: transitions_rows.right,
+            MOVE.LEFT: transitions_rows.left,
+        }
+
+    @staticmethod
+    def from_matrix(matrix) -> Board:
+        return tuple(map(tuple, matrix.tolist()))
+
+    def move(self, board: Board, move: MOVE) -> tuple[Board, int]:
+        """Return the new board and score gained by the move."""
+
+        transition_of = self.transitions[move]
+        is_transposed = move in (MOVE.UP, MOVE.DOWN)
+        lines = zip(*board) if is_transposed else board
+
+        result = []
+        score = 0
+        for line in lines:
+            transition = transition_of(line)
+            result.append(transition.row)
+            score += transition.score
+
+        if is_transposed:
+            return tuple(zip(*result)), score
+        return tuple(result), score
+
+    @staticmethod
+    def empty_cells(board: Board) -> list[tuple[int, int]]:
+        return [
+            (row, col)
+            for row, cells in enumerate(board)
+            for col, value in enumerate(cells)
+            if not value
+        ]
+
+    @staticmethod
+    def place(board: Board, row: int, col: int, value: int) -> Board:
+        """Return the board with the new tile."""
+        cells = board[row]
+        return board[:row] + (cells[:col] + (value,) + cells[col + 1:],) + board[row + 1:]
+
+
+@lru_cache(maxsize=2 ** 16)
+def evaluate_line(line: tuple[int, ...]) -> float:
+    """
+    Heuristic evaluation of the single row (or column):
+    empty cells and possible merges are good,
+    non-monotonic order and large tiles apart of the border are bad.
+    """
+
+    total = sum(value ** SCORE_SUM_POWER for value in line)
+    empty = line.count(0)
+
+    merges = 0
+    previous = counter = 0
+    for value in line:
+        if not value:
+            continue
+        if value == previous:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = value
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = monotonicity_right = 0.0
+    for a, b in zip(line, line[1:]):
+        if a > b:
+            monotonicity_left += a ** SCORE_MONOTONICITY_POWER - b ** SCORE_MONOTONICITY_POWER
+        else:
+            monotonicity_right += b ** SCORE_MONOTONICITY_POWER - a ** SCORE_MONOTONICITY_POWER
+
+    return SCORE_LOST_PENALTY + \
+        SCORE_EMPTY_WEIGHT * empty + \
+        SCORE_MERGES_WEIGHT * merges - \
+        SCORE_MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right) - \
+        SCORE_SUM_WEIGHT * total
+
+
+def evaluate(board: Board) -> float:
+    """Heuristic evaluation of the board by all its rows and columns."""
+    return sum(map(evaluate_line, board)) + sum(map(evaluate_line, zip(*board)))
+
+
+# --- Transposition table -----------------------------------------------------
+
+class TranspositionTable:
+    """
+    Fixed-size table of already evaluated boards, keyed by board hash.
+    Each slot keeps single board, replaced only by searched not shallower.
+    """
+
+    def __init__(self, size: int = AI.TABLE_SIZE):
+        self.size = size
+        self.keys: list[Optional[Board]] = [None] * size
+        self.depths = [0] * size
+        self.values = [0.0] * size
+
+    def lookup(self, board: Board, depth: int) -> Optional[float]:
+        """Return value of the board searched at least to the given depth."""
+        slot = hash(board) % self.size
+        if self.depths[slot] >= depth and self.keys[slot] == board:
+            return self.values[slot]
+        return None
+
+    def store(self, board: Board, depth: int, value: float):
+        slot = hash(board) % self.size
+        if depth >= self.depths[slot] or self.keys[slot] is None:
+            self.keys[slot] = board
+            self.depths[slot] = depth
+            self.values[slot] = value
+
+    def clear(self):
+        self.__init__(self.size)
+
+
+# --- Players -----------------------------------------------------------------
+
+class Player:
+    """Base class for AI players."""
+
+    # moves over the search board, prepared for the grid size
+    moves: Optional[BoardMoves] = None
+
+    def _prepare_board(self, logic: Logic) -> Board:
+        """Return the search board for the current grid."""
+        if self.moves is None or (self.moves.rows, self.moves.cols) != (logic.rows, logic.cols):
+            self.moves = BoardMoves(logic.rows, logic.cols)
+        return BoardMoves.from_matrix(logic.matrix)
+
+    def choose_move(self, logic: Logic) -> MOVE:
+        """Return the move chosen for the current grid, MOVE.NONE if lost."""
+        raise NotImplementedError
+
+
+class RandomPlayer(Player):
+    """Choosing any of the possible moves at random."""
+
+    def __init__(self, seed=None):
+        """:param seed: seed for the player's own random generator"""
+        self.rng = np.random.default_rng(seed)
+
+    def choose_move(self, logic: Logic) -> MOVE:
+
+        possible = logic.legal_moves()
+        if not possible:
+            return MOVE.NONE
+        return possible[self.rng.integers(len(possible))]
+
+
+class GreedyPlayer(Player):
+    """
+    Choosing the move with the highest immediate score,
+    the ties are resolved by heuristic evaluation of the board.
+    """
+
+    def choose_move(self, logic: Logic) -> MOVE:
+
+        board = self._prepare_board(logic)
+
+        result = MOVE.NONE
+        best = None
+        for move in MOVES:
+            board_new, score = self.moves.move(board, move)
+            if board_new == board:
+                continue
+            value = (score, evaluate(board_new))
+            if best is None or value > best:
+                best = value
+                result = move
+        return result
+
+
+class _Timeout(Exception):
+    """Time budget for the move is exhausted."""
+
+
+class ExpectimaxPlayer(Player):
+    """
+    Depth-limited expectimax search:
+    maximizing over the moves and averaging over the random new tiles,
+    using iterative deepening within the time budget for each move.
+    """
+
+    def __init__(
+            self,
+            depth: int = AI.DEPTH,
+            time_budget: float = AI.TIME_BUDGET,
+            table_size: int = AI.TABLE_SIZE
+    ):
+        """
+        :param depth: maximum depth of the search (in moves)
+        :param time_budget: time in seconds for each move, None for unlimited
+        :param table_size: number of entries in the transposition table
+        """
+        self.depth = depth
+        self.time_budget = time_budget
+        self.table = TranspositionTable(table_size)
+        self.deadline: Optional[float] = None
+
+    def choose_move(self, logic: Logic) -> MOVE:
+
+        board = self._prepare_board(logic)
+
+        # the first depth is always completed to have any move at all
+        result = MOVE.NONE
+        self.deadline = None
+        start = perf_counter()
+        for depth in range(1, self.depth + 1):
+            try:
+                result = self._search_root(board, depth)
+            except _Timeout:
+                break
+            if result == MOVE.NONE:
+                break
+            if self.time_budget is not None:
+                self.deadline = start + self.time_budget
+
+        return result
+
+    def _search_root(self, board: Board, depth: int) -> MOVE:
+        result = MOVE.NONE
+        best = -1.0
+        for move in MOVES:
+            board_new, _ = self.moves.move(board, move)
+            if board_new == board:
+                continue
+            value = self._chance_node(board_new, depth - 1, 1.0)
+            if value > best:
+                best = value
+                result = move
+        return result
+
+    def _max_node(self, board: Board, depth: int, probability: float) -> float:
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise _Timeout
+
+        best = 0.0  # no moves at all: lost game
+        for move in MOVES:
+            board_new, _ = self.moves.move(board, move)
+            if board_new == board:
+                continue
+            best = max(best, self._chance_node(board_new, depth - 1, probability))
+        return best
+
+    def _chance_node(self, board: Board, depth: int, probability: float) -> float:
+        if depth <= 0 or probability < PROBABILITY_MIN:
+            return evaluate(board)
+
+        value = self.table.lookup(board, depth)
+        if value is not None:
+            return value
+
+        cells = self.moves.empty_cells(board)
+        if not cells:
+            return evaluate(board)
+        probability /= len(cells)
+
+        total = 0.0
+        for row, col in cells:
+            for tile, tile_probability in zip(NEW_TILE_VALUES, NEW_TILE_PROBABILITIES):
+                total += tile_probability * self._max_node(
+                    self.moves.place(board, row, col, tile),
+                    depth,
+                    probability * tile_probability
+                )
+        value = total / len(cells)
+
+        self.table.store(board, depth, value)
+        return value
+
+
+class MonteCarloPlayer(Player):
+    """
+    Monte Carlo rollouts: each possible move is followed by the playouts,
+    random or greedy ones, to the given depth; the best mean score wins.
+    Playouts of all the moves are made at once by the vectorized batch engine,
+    by batches until the number of playouts or the time budget is exhausted.
+    """
+
+    def __init__(
+            self,
+            rollouts: int = AI.ROLLOUTS,
+            depth: int = AI.ROLLOUT_DEPTH,
+            policy: ROLLOUT = AI.ROLLOUT_POLICY,
+            time_budget: float = AI.TIME_BUDGET,
+            seed=None
+    ):
+        """
+        :param rollouts: the largest number of playouts for each move
+        :param depth: number of moves of each playout (unless it is lost)
+        :param policy: policy of moves in playouts
+        :param time_budget: time in seconds for each move, None for unlimited
+        :param seed: seed for the player's own random generator
+        """
+        self.rollouts = rollouts
+        self.depth = depth
+        self.policy = policy
+        self.time_budget = time_budget
+        self.rng = np.random.default_rng(seed)
+        self.deadline: Optional[float] = None
+
+    def choose_move(self, logic: Logic) -> MOVE:
+
+        # the first move of each playout is the move itself
+        first = Logic.move_batch(np.repeat(logic.matrix[None], len(MOVES), axis=0), list(MOVES))
+        possible = np.flatnonzero(first.changed)
+        if possible.size <= 1:
+            return MOVES[possible[0]] if possible.size else MOVE.NONE
+
+        # the first step of the first batch is always made to have any estimation
+        # at all, playouts are cut at the deadline (all the moves to the same depth)
+        totals = np.zeros(possible.size)
+        count = 0
+        self.deadline = None if self.time_budget is None else perf_counter() + self.time_budget
+        while count < self.rollouts:
+            batch = min(AI.ROLLOUTS_BATCH, self.rollouts - count)
+            scores = self._playout(np.repeat(first.boards[possible], batch, axis=0))
+            totals += scores.reshape(possible.size, batch).sum(axis=1)
+            count += batch
+            if self.deadline is not None and perf_counter() > self.deadline:
+                break
+
+        means = first.scores[possible] + totals / count
+        return MOVES[possible[np.argmax(means)]]
+
+    def _spawn(self, boards: np.ndarray):
+        """New tile on the random empty cell of each board, in place."""
+
+        cells = boards.reshape(len(boards), -1)
+        is_empty = cells == 0
+        has_empty = np.flatnonzero(is_empty.any(axis=1))
+
+        keys = self.rng.random(cells.shape)
+        keys[~is_empty] = -1.0
+        values = np.where(
+            self.rng.random(len(boards)) < NEW_TILE_PROBABILITIES[0],
+            NEW_TILE_VALUES[0],
+            NEW_TILE_VALUES[1]
+        )
+        cells[has_empty, keys[has_empty].argmax(axis=1)] = values[has_empty]
+
+    def _playout(self, boards: np.ndarray) -> np.ndarray:
+        """Return score gained by the playout from each board after the move."""
+
+        boards = boards.copy()
+        self._spawn(boards)
+        scores = np.zeros(len(boards), dtype=np.int64)
+        alive = np.arange(len(boards))  # boards which are not lost yet
+
+        for depth in range(self.depth):
+            if depth and self.deadline is not None and perf_counter() > self.deadline:
+                break
+            current = boards[alive]
+            results = [Logic.move_batch(current, move) for move in MOVES]
+            changed = np.array([result.changed for result in results])
+
+            # random keys choose any of the possible moves,
+            # adding immediate scores makes the choice greedy
+            keys = self.rng.random(changed.shape)
+            if self.policy == ROLLOUT.GREEDY:
+                keys += np.array([result.scores for result in results])
+            keys[~changed] = -1.0
+            choice = keys.argmax(axis=0)
+
+            is_alive = changed.any(axis=0)
+            index = np.arange(len(alive))[is_alive]
+            moved = np.array([result.boards for result in results])[choice[is_alive], index]
+            gained = np.array([result.scores for result in results])[choice[is_alive], index]
+
+            alive = alive[is_alive]
+            if not alive.size:
+                break
+            self._spawn(moved)
+            boards[alive] = moved
+            scores[alive] += gained
+
+        return scores
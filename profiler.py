@@ -0,0 +1,117 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(I) Data level abstraction.
+Profiling of frame time and hot paths, for development purposes.
+"""
+
+
+# System imports
+import csv
+from functools import wraps
+from time import perf_counter
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import PROFILER
+
+
+# --- Profiler ----------------------------------------------------------------
+
+class Profiler:
+    """
+    Per-frame timings of the instrumented methods,
+    kept for the latest frames in the fixed-size ring buffer.
+    Methods are instrumented by wrapping them on the instance,
+    so nothing is measured (and nothing costs) without the Profiler.
+    """
+
+    # total time of the frame, measured from the previous frame
+    FRAME = 'frame'
+
+    def __init__(self, sections: tuple[str, ...], frames: int = PROFILER.FRAMES):
+        """
+        :param sections: names of the measured sections, apart from the frame
+        :param frames: number of the latest frames kept in the buffer
+        """
+
+        self.sections = (self.FRAME,) + tuple(sections)
+
+        # ring buffer of timings in milliseconds: [frame, section]
+        self.buffer = np.zeros((frames, len(self.sections)))
+        self.index = 0  # position of the next frame in the buffer
+        self.count = 0  # number of frames kept in the buffer
+        self.frames = 0  # number of frames measured in total
+
+        # time accumulated by the sections during the current frame
+        self.totals = [0.0] * len(self.sections)
+        self.frame_start = None
+
+    def instrument(self, owner, method_name: str, section: str):
+        """Measuring every call of the method of the owner object."""
+
+        method = getattr(owner, method_name)
+        index = self.sections.index(section)
+        totals = self.totals
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                totals[index] += perf_counter() - start
+
+        setattr(owner, method_name, timed)
+
+    def next_frame(self):
+        """Saving timings of the finished frame into the buffer."""
+
+        now = perf_counter()
+        if self.frame_start is not None:
+            self.totals[0] = now - self.frame_start
+            self.buffer[self.index] = self.totals
+            self.buffer[self.index] *= 1000
+            self.index = (self.index + 1) % len(self.buffer)
+            self.count = min(self.count + 1, len(self.buffer))
+            self.frames += 1
+        self.frame_start = now
+        self.totals[:] = [0.0] * len(self.totals)
+
+    def latest(self) -> np.ndarray:
+        """Timings of the frames in the buffer, from the oldest to the latest."""
+        if self.count < len(self.buffer):
+            return self.buffer[:self.count]
+        return np.roll(self.buffer, -self.index, axis=0)
+
+    def percentiles(self) -> dict[str, tuple[float, float, float]]:
+        """Rolling p50/p95/p99 of each section over the frames in the buffer."""
+        if not self.count:
+            return {section: (0.0, 0.0, 0.0) for section in self.sections}
+        values = np.percentile(self.buffer[:self.count], (50, 95, 99), axis=0)
+        return {
+            section: tuple(values[:, index].tolist())
+            for index, section in enumerate(self.sections)
+        }
+
+    def summary(self) -> list[str]:
+        """Lines of p50 / p95 / p99 in milliseconds, for the overlay."""
+        return [
+            f'{section}: {p50:.2f} / {p95:.2f} / {p99:.2f}'
+            + (' ms' if section == self.FRAME else '')
+            for section, (p50, p95, p99) in self.percentiles().items()
+        ]
+
+    def dump_csv(self, file_name: str):
+        """Dumping timings of the frames in the buffer to csv file."""
+        with open(file_name, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(('frame_number',) + self.sections)
+            first = self.frames - self.count
+            for number, row in enumerate(self.latest().tolist(), start=first):
+                writer.writerow([number] + [round(value, 4) for value in row])
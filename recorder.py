@@ -0,0 +1,272 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(I) Data level abstraction.
+Compact binary log of the game: streaming writer and reader.
+"""
+
+
+# System imports
+import struct
+from typing import BinaryIO, Iterator, Optional, Union
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import MOVE
+
+
+# --- Format ------------------------------------------------------------------
+#
+#   header:   magic '2048', version, rows, cols, has_seed, seed, keyframe interval
+#   records, each one starts with the tag byte (high nibble is the kind):
+#   ┌──────────┬────────────────────┬───────────────────────────────────────┐
+#   │ move     │ 0x0? (? = MOVE)    │                                       │
+#   │ spawn    │ 0x1? (? = power)   │ cell index: row * cols + col (1 byte) │
+#   │ keyframe │ 0xF0               │ move index, score, matrix (uint16)    │
+#   └──────────┴────────────────────┴───────────────────────────────────────┘
+#   keyframe is written before the move it is indexed with,
+#   periodically and after any change of the matrix apart from the moves.
+
+MAGIC = b'2048'
+VERSION = 1
+
+HEADER = struct.Struct('<4sBBBBQH')
+KEYFRAME = struct.Struct('<IQ')
+
+TAG_KIND = 0xF0
+TAG_MOVE = 0x00
+TAG_SPAWN = 0x10
+TAG_KEYFRAME = 0xF0
+
+# matrix as stored in keyframes
+KEYFRAME_TYPE = np.dtype('<u2')
+
+# default number of moves between periodic keyframes
+KEYFRAME_INTERVAL = 64
+
+
+# --- GameRecorder ------------------------------------------------------------
+
+class GameRecorder:
+    """Append-only writer of the game log, hooked into Logic."""
+
+    def __init__(
+            self,
+            file: Union[str, BinaryIO],
+            rows: int, cols: int,
+            seed: Optional[int] = None,
+            keyframe_interval: int = KEYFRAME_INTERVAL
+    ):
+        """
+        :param file: path or binary stream to write the log to
+        :param seed: seed of the game, for reference only
+        :param keyframe_interval: number of moves between periodic keyframes
+        """
+
+        if rows * cols > 256:
+            raise ValueError(f"Grid {rows}x{cols} is too large for the log format")
+
+        self.is_owner = isinstance(file, str)
+        self.file: BinaryIO = open(file, 'wb') if self.is_owner else file
+        self.rows, self.cols = rows, cols
+        self.keyframe_interval = keyframe_interval
+
+        # number of moves recorded and moves since the last keyframe
+        self.moves = 0
+        self.moves_since_keyframe = 0
+
+        self.file.write(HEADER.pack(
+            MAGIC, VERSION, rows, cols,
+            seed is not None, seed or 0,
+            keyframe_interval
+        ))
+
+    def record_keyframe(self, matrix: np.ndarray, score: int):
+        self.file.write(bytes([TAG_KEYFRAME]))
+        self.file.write(KEYFRAME.pack(self.moves, score))
+        self.file.write(matrix.astype(KEYFRAME_TYPE).tobytes())
+        self.moves_since_keyframe = 0
+
+    def record_move(self, move: MOVE, matrix: np.ndarray, score: int):
+        """Recording the move before it is performed over the matrix."""
+        if self.moves_since_keyframe >= self.keyframe_interval:
+            self.record_keyframe(matrix, score)
+        self.file.write(bytes([TAG_MOVE | move.value]))
+        self.moves += 1
+        self.moves_since_keyframe += 1
+
+    def record_spawn(self, row: int, col: int, value: int):
+        self.file.write(bytes([TAG_SPAWN | value, row * self.cols + col]))
+
+    def close(self):
+        if self.is_owner:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+# --- GameReader --------------------------------------------------------------
+
+class GameReader:
+    """
+    Streaming reader of the game log.
+    Records are read one by one, never loading the whole file.
+    """
+
+    def __init__(self, file: Union[str, BinaryIO]):
+        """:param file: path or seekable binary stream to read the log from"""
+
+        self.is_owner = isinstance(file, str)
+        self.file: BinaryIO = open(file, 'rb') if self.is_owner else file
+
+        magic, version, self.rows, self.cols, has_seed, seed, self.keyframe_interval = \
+            HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Not a game log: unexpected magic bytes")
+        if version != VERSION:
+            raise ValueError(f"Unsupported game log version: {version}")
+        self.seed = seed if has_seed else None
+
+        self.start = self.file.tell()
+        self.matrix_size = self.rows * self.cols * KEYFRAME_TYPE.itemsize
+
+        # (move index, file offset) of keyframes, scanned on demand
+        self.keyframes: Optional[list[tuple[int, int]]] = None
+
+    def close(self):
+        if self.is_owner:
+            self.file.close()
+
+    # --- Reading records -----------------------------------------------------
+
+    def records(self, offset: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Reading records one by one, starting from the given file offset:
+        ('move', MOVE), ('spawn', row, col, value)
+        or ('keyframe', move index, score, matrix).
+        """
+
+        self.file.seek(self.start if offset is None else offset)
+        while True:
+            tag = self.file.read(1)
+            if not tag:
+                return
+            tag = tag[0]
+            kind = tag & TAG_KIND
+
+            if kind == TAG_MOVE:
+                yield 'move', MOVE(tag)
+            elif kind == TAG_SPAWN:
+                row, col = divmod(self.file.read(1)[0], self.cols)
+                yield 'spawn', row, col, tag & ~TAG_KIND
+            elif kind == TAG_KEYFRAME:
+                index, score = KEYFRAME.unpack(self.file.read(KEYFRAME.size))
+                matrix = np.frombuffer(self.file.read(self.matrix_size), dtype=KEYFRAME_TYPE)
+                yield 'keyframe', index, score, matrix.reshape(self.rows, self.cols)
+            else:
+                raise ValueError(f"Unexpected record tag: {tag:#04x}")
+
+    def scan_keyframes(self) -> list[tuple[int, int]]:
+        """Building index of keyframes by skipping through the records."""
+
+        if self.keyframes is not None:
+            return self.keyframes
+
+        self.keyframes = []
+        self.file.seek(self.start)
+        while True:
+            offset = self.file.tell()
+            tag = self.file.read(1)
+            if not tag:
+                break
+            kind = tag[0] & TAG_KIND
+            if kind == TAG_SPAWN:
+                self.file.seek(1, 1)
+            elif kind == TAG_KEYFRAME:
+                index, _ = KEYFRAME.unpack(self.file.read(KEYFRAME.size))
+                self.file.seek(self.matrix_size, 1)
+                self.keyframes.append((index, offset))
+
+        return self.keyframes
+
+    # --- Replaying -----------------------------------------------------------
+
+    def _nearest_keyframe(self, index: int) -> tuple[Optional[int], int]:
+        """Return file offset and move index of the last keyframe before the move."""
+        result = None, 0
+        for keyframe_index, keyframe_offset in self.scan_keyframes():
+            if keyframe_index > index:
+                break
+            result = keyframe_offset, keyframe_index
+        return result
+
+    def _apply(self, logic, record: tuple):
+        """Applying single record, but the move, to the Logic."""
+        if record[0] == 'spawn':
+            logic.place_tile(*record[1:])
+        elif record[0] == 'keyframe':
+            logic.set_matrix(record[3], record[2])
+
+    def replay(self, logic, start: int = 0) -> Iterator[int]:
+        """
+        Replaying the log through the Logic.
+        Yield index of each move once the move and its new tile are applied.
+        Moves before the start one are applied silently,
+        starting from the nearest keyframe.
+
+        :param logic: Logic with the same grid size, preferably headless
+        :param start: index of the first move to yield
+        """
+
+        self._check_logic(logic)
+        offset, index = self._nearest_keyframe(start)
+
+        pending = None  # index of the move applied, but not yielded yet
+        for record in self.records(offset):
+            if record[0] != 'spawn' and pending is not None:
+                if pending >= start:
+                    yield pending
+                pending = None
+            if record[0] == 'move':
+                logic.move(record[1])
+                pending = index
+                index += 1
+            else:
+                if record[0] == 'keyframe':
+                    index = record[1]
+                self._apply(logic, record)
+
+        if pending is not None and pending >= start:
+            yield pending
+
+    def matrix_at(self, logic, index: int) -> np.ndarray:
+        """
+        Random access to the matrix right before the move by its index,
+        replayed through the Logic from the nearest keyframe.
+        """
+
+        self._check_logic(logic)
+        offset, index_next = self._nearest_keyframe(index)
+
+        for record in self.records(offset):
+            if record[0] == 'move':
+                if index_next == index:
+                    break
+                logic.move(record[1])
+                index_next += 1
+            else:
+                if record[0] == 'keyframe':
+                    index_next = record[1]
+                self._apply(logic, record)
+
+        return logic.matrix
+
+    def _check_logic(self, logic):
+        if (logic.rows, logic.cols) != (self.rows, self.cols):
+            raise ValueError(f"Logic grid {logic.rows}x{logic.cols} differs "
+                             f"from the log grid {self.rows}x{self.cols}")
@@ -0,0 +1,296 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(V) Control level abstraction.
+Asyncio game server of many concurrent sessions over JSON lines. Entry point.
+"""
+
+
+# System imports
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass
+from secrets import token_hex
+from time import monotonic
+from typing import Optional
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import GAME, SERVER, ENGINE, MOVE
+from logic import Logic
+
+
+# --- Protocol ----------------------------------------------------------------
+#
+#   each request and response is a single line of JSON, "id" is echoed back:
+#   → {"id": 1, "op": "new_game", "seed": 42}              (seed is optional)
+#   → {"id": 2, "op": "move", "session": "...", "move": "up"}
+#   → {"id": 3, "op": "undo", "session": "..."}
+#   → {"id": 4, "op": "state", "session": "..."}
+#   ← {"id": ..., "ok": true, "session": "...", "seed": ..., "matrix": [[...]],
+#      "score": ..., "moves": ..., "moved": ..., "undo": ..., "lost": ...}
+#   ← {"id": ..., "ok": false, "error": "..."}
+
+MOVES = {move.name.lower(): move for move in MOVE if move != MOVE.NONE}
+
+
+class RequestError(Exception):
+    """Request could not be served, reported back to the client."""
+
+
+# --- Sessions ----------------------------------------------------------------
+
+@dataclass
+class Session:
+    """Single game with its own Logic: matrix, undo history and Stats."""
+
+    id: str
+    seed: int
+    logic: Logic
+    last_used: float
+
+
+class SessionPool:
+    """
+    Sessions by their ids. Logic instances of closed sessions are kept
+    for reuse, since creating of Logic costs much more than the new game.
+    """
+
+    def __init__(
+            self,
+            max_sessions: int = SERVER.MAX_SESSIONS,
+            pool_size: int = SERVER.POOL_SIZE,
+            seed: Optional[int] = None
+    ):
+        """:param seed: seed of the seeds of all the sessions without their own"""
+        self.max_sessions = max_sessions
+        self.pool_size = pool_size
+        self.sessions: dict[str, Session] = dict()
+        self.free: list[Logic] = []
+        self.seeds = np.random.SeedSequence(seed)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def create(self, seed: Optional[int] = None) -> Session:
+        """New session with the new game, seeded by the given seed or the next one."""
+
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("Too many sessions")
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+            raise RequestError(f"Unexpected seed: {seed}")
+        if seed is None:
+            seed = int(self.seeds.spawn(1)[0].generate_state(1)[0])
+
+        logic = self.free.pop() if self.free else Logic(GAME, headless=True)
+        logic.new_game(seed)
+
+        session = Session(token_hex(8), seed, logic, monotonic())
+        self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id) -> Session:
+        session = self.sessions.get(session_id) if isinstance(session_id, str) else None
+        if session is None:
+            raise RequestError(f"Unknown session: {session_id}")
+        session.last_used = monotonic()
+        return session
+
+    def close(self, session: Session):
+        """Closing the session, its Logic is kept for reuse."""
+        del self.sessions[session.id]
+        if len(self.free) < self.pool_size:
+            self.free.append(session.logic)
+
+    def evict_idle(self, idle_timeout: float = SERVER.IDLE_TIMEOUT) -> int:
+        """Closing the sessions idle for too long. Return number of them."""
+        deadline = monotonic() - idle_timeout
+        idle = [session for session in self.sessions.values() if session.last_used < deadline]
+        for session in idle:
+            self.close(session)
+        return len(idle)
+
+
+# --- Moves -------------------------------------------------------------------
+
+class MoveBatcher:
+    """
+    Moves requested by all the clients during single iteration of event loop
+    are made at once by the batch engine (Logic.move_many).
+    The next move of the same session waits for the next batch.
+    """
+
+    def __init__(self):
+        self.pending: list[tuple[Session, MOVE, asyncio.Future]] = []
+        self.is_scheduled = False
+
+    def submit(self, session: Session, move: MOVE) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((session, move, future))
+        if not self.is_scheduled:
+            self.is_scheduled = True
+            loop.call_soon(self._flush)
+        return future
+
+    def _flush(self):
+        self.is_scheduled = False
+
+        batch = []
+        later = []
+        sessions = set()
+        for item in self.pending:
+            if item[0].id in sessions:
+                later.append(item)
+            else:
+                sessions.add(item[0].id)
+                batch.append(item)
+        self.pending = later
+        if later:
+            self.is_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+        results = Logic.move_many(
+            [session.logic for session, _, _ in batch],
+            [move for _, move, _ in batch]
+        )
+        for (session, _, future), result in zip(batch, results):
+            if result != MOVE.NONE:
+                session.logic.generate_new_tile(session.logic.choose_tile())
+            if not future.done():  # the client might be gone already
+                future.set_result(result)
+
+
+# --- Server ------------------------------------------------------------------
+
+class GameServer:
+    """Serving requests of the clients, line by line."""
+
+    def __init__(self, pool: SessionPool, is_batched: bool = SERVER.IS_BATCHED):
+        self.pool = pool
+        self.batcher = MoveBatcher() if is_batched else None
+
+    @staticmethod
+    def state(session: Session, moved: Optional[bool] = None) -> dict:
+        logic = session.logic
+        result = {
+            'session': session.id,
+            'seed': session.seed,
+            'matrix': logic.matrix.tolist(),
+            'score': logic.stats.score,
+            'moves': sum(logic.stats.move.values()),
+            'undo': logic.is_history_there(),
+            'lost': logic.is_game_lost(),
+        }
+        if moved is not None:
+            result['moved'] = moved
+        return result
+
+    async def serve_request(self, request: dict) -> dict:
+        op = request.get('op')
+
+        if op == 'new_game':
+            return self.state(self.pool.create(request.get('seed')))
+
+        session = self.pool.get(request.get('session'))
+
+        if op == 'move':
+            move = request.get('move')
+            move = MOVES.get(move) if isinstance(move, str) else None
+            if move is None:
+                raise RequestError(f"Unexpected move: {request.get('move')}")
+            if self.batcher is not None:
+                result = await self.batcher.submit(session, move)
+            else:
+                result = session.logic.move(move)
+                if result != MOVE.NONE:
+                    session.logic.generate_new_tile(session.logic.choose_tile())
+            return self.state(session, result != MOVE.NONE)
+        elif op == 'undo':
+            return self.state(session, bool(session.logic.pop_from_history()))
+        elif op == 'state':
+            return self.state(session)
+        else:
+            raise RequestError(f"Unexpected op: {op}")
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("Request should be JSON object")
+                    response = {'ok': True, **await self.serve_request(request)}
+                except (RequestError, ValueError) as error:
+                    response = {'ok': False, 'error': str(error)}
+                if 'id' in request:
+                    response = {'id': request['id'], **response}
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass  # the client is gone (or sent too long line), its sessions are left to be evicted
+        finally:
+            writer.close()
+
+    async def evict_idle(self, idle_timeout: float, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.pool.evict_idle(idle_timeout)
+
+
+async def serve(args: dict):
+    GAME.ROWS, GAME.COLS = args['rows'], args['cols']
+    GAME.ENGINE = ENGINE[args['engine'].upper()]
+    GAME.UNDO = args['undo']
+
+    server = GameServer(
+        SessionPool(args['max_sessions'], args['pool_size'], args['seed']),
+        is_batched = not args['no_batch']
+    )
+    evictor = asyncio.create_task(server.evict_idle(args['idle_timeout'], SERVER.EVICT_INTERVAL))
+    async with await asyncio.start_server(
+            server.handle_client, args['host'], args['port'], limit=2 ** 16, backlog=4096
+    ) as tcp_server:
+        print(f"Serving on {args['host']}:{args['port']}")
+        try:
+            await tcp_server.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+# --- Main Program ------------------------------------------------------------
+
+def parse_args() -> dict:
+    parser = argparse.ArgumentParser(description='Game server of many concurrent sessions over JSON lines.')
+    parser.add_argument('--host', default=SERVER.HOST, help='host to listen on')
+    parser.add_argument('--port', type=int, default=SERVER.PORT, help='port to listen on')
+    parser.add_argument('--max-sessions', type=int, default=SERVER.MAX_SESSIONS, help='sessions at once')
+    parser.add_argument('--pool-size', type=int, default=SERVER.POOL_SIZE, help='Logic instances kept for reuse')
+    parser.add_argument('--idle-timeout', type=float, default=SERVER.IDLE_TIMEOUT,
+                        help='idle sessions are closed after this time in seconds')
+    parser.add_argument('--no-batch', action='store_true', help='moves one by one, without the batch engine')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the seeds of sessions')
+    parser.add_argument('--rows', type=int, default=GAME.ROWS, help='rows of the grid')
+    parser.add_argument('--cols', type=int, default=GAME.COLS, help='columns of the grid')
+    parser.add_argument('--engine', choices=[engine.name.lower() for engine in ENGINE],
+                        default=GAME.ENGINE.name.lower(), help='engine performing unbatched moves')
+    parser.add_argument('--undo', type=int, default=GAME.UNDO, help='undo operations of each session')
+    return vars(parser.parse_args())
+
+
+def main():
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
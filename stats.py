@@ -9,6 +9,12 @@ Data structures and interfaces.
 """
 
 
+# System imports
+from dataclasses import dataclass, field
+
+# External imports
+import numpy as np
+
 # Project imports
 from config import MOVE
 
@@ -21,9 +27,47 @@ class Stats:
     def __init__(self, rows: int, cols: int):
         self.score = 0
         self.score_incremental = 0
+        self.merge_incremental: list[int] = []
         self.move = {move: 0 for move in MOVE}
         self.moves_idle = 0
         self.merge = {i + 2: 0 for i in range(rows * cols + 1)}
 
     def reset(self, rows: int, cols: int):
         self.__init__(rows, cols)
+
+
+# --- MoveDelta ---------------------------------------------------------------
+
+@dataclass
+class MoveDelta:
+    """
+    Reversible record of the single move in history of moves:
+    only the cells changed by the move (and new tiles after it)
+    with increments of statistics.
+    """
+
+    move: MOVE
+    # flat indexes of the cells changed by the move and their previous values
+    cells: np.ndarray
+    values: np.ndarray
+    # increments of statistics made by the move
+    score: int = 0
+    merges: list[int] = field(default_factory=list)
+    # idle moves counted before the move, restored as is: the moves
+    # changing nothing are counted too, but never saved to history
+    moves_idle: int = 0
+    # flat indexes of the new tiles generated after the move
+    spawns: list[int] = field(default_factory=list)
+
+    def revert(self, matrix: np.ndarray, stats: Stats):
+        """Reverting the move over the matrix (in place) and statistics."""
+
+        if self.spawns:
+            matrix[np.unravel_index(self.spawns, matrix.shape)] = 0
+        matrix[np.unravel_index(self.cells, matrix.shape)] = self.values
+
+        stats.score -= self.score
+        stats.move[self.move] -= 1
+        stats.moves_idle = self.moves_idle
+        for power in self.merges:
+            stats.merge[power] -= 1
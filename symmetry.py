@@ -0,0 +1,132 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(III) Logic level abstraction.
+Symmetries of the grid: canonical representative of the board
+among all its symmetric boards, e.g. for keys of caches and solvers.
+"""
+
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import MOVE, SYMMETRY
+import bitboard
+
+
+# --- Constants ---------------------------------------------------------------
+
+# bit flags of SYMMETRY values
+_FLIP_COLS = 1
+_FLIP_ROWS = 2
+_TRANSPOSE = 4
+
+# symmetries which keep the shape of the grid with rows != cols
+SYMMETRIES_RECTANGULAR = tuple(s for s in SYMMETRY if not s.value & _TRANSPOSE)
+
+# direction (drow, dcol) of each move
+_DIRECTIONS = {
+    MOVE.UP: (-1, 0),
+    MOVE.DOWN: (1, 0),
+    MOVE.RIGHT: (0, 1),
+    MOVE.LEFT: (0, -1),
+}
+_MOVES = {direction: move for move, direction in _DIRECTIONS.items()}
+
+
+# --- Symmetries --------------------------------------------------------------
+
+def symmetries_of(rows: int, cols: int) -> tuple[SYMMETRY, ...]:
+    """All the symmetries of the grid with the given size."""
+    return tuple(SYMMETRY) if rows == cols else SYMMETRIES_RECTANGULAR
+
+
+def invert(symmetry: SYMMETRY) -> SYMMETRY:
+    """Symmetry reverting the given one."""
+    if symmetry == SYMMETRY.ROTATE_CW:
+        return SYMMETRY.ROTATE_CCW
+    if symmetry == SYMMETRY.ROTATE_CCW:
+        return SYMMETRY.ROTATE_CW
+    return symmetry  # any other symmetry reverts itself
+
+
+def transform(matrix: np.ndarray, symmetry: SYMMETRY) -> np.ndarray:
+    """
+    Matrix transformed by the symmetry (as view, if possible).
+    Works over the last two axes, so over the batch of matrices as well.
+    """
+    if symmetry.value & _TRANSPOSE:
+        matrix = np.swapaxes(matrix, -2, -1)
+    if symmetry.value & _FLIP_ROWS:
+        matrix = matrix[..., ::-1, :]
+    if symmetry.value & _FLIP_COLS:
+        matrix = matrix[..., ::-1]
+    return matrix
+
+
+def transform_packed(board: int, symmetry: SYMMETRY) -> int:
+    """Packed 4x4 board (see bitboard) transformed by the symmetry."""
+    if symmetry.value & _TRANSPOSE:
+        board = bitboard.transpose(board)
+    if symmetry.value & _FLIP_ROWS:
+        board = bitboard.flip_rows(board)
+    if symmetry.value & _FLIP_COLS:
+        board = bitboard.flip_cols(board)
+    return board
+
+
+def transform_move(move: MOVE, symmetry: SYMMETRY) -> MOVE:
+    """
+    Move over the transformed matrix, equal to the given one over the original.
+    So the move chosen for the canonical board is reverted by the inverted symmetry.
+    """
+    if move == MOVE.NONE:
+        return MOVE.NONE
+    drow, dcol = _DIRECTIONS[move]
+    if symmetry.value & _TRANSPOSE:
+        drow, dcol = dcol, drow
+    if symmetry.value & _FLIP_ROWS:
+        drow = -drow
+    if symmetry.value & _FLIP_COLS:
+        dcol = -dcol
+    return _MOVES[drow, dcol]
+
+
+# --- Canonical boards --------------------------------------------------------
+# Canonical board is the least one of all its symmetric boards,
+# comparing cells from the last one to the first one. Such order is the same
+# as of packed boards by their integer value, so both forms are consistent.
+
+def canonical(matrix: np.ndarray) -> tuple[np.ndarray, SYMMETRY]:
+    """
+    Return the canonical matrix and the symmetry transforming into it,
+    i.e. transform(matrix, symmetry) equals the canonical matrix.
+    """
+
+    symmetries = symmetries_of(*matrix.shape)
+    variants = np.array([transform(matrix, symmetry).ravel() for symmetry in symmetries])
+
+    # the last key is the primary one for lexsort, the first least is taken
+    # (rectangular grid is never transposed, so the shape is always kept)
+    index = int(np.lexsort(variants.T)[0])
+    return variants[index].reshape(matrix.shape), symmetries[index]
+
+
+def canonical_packed(board: int) -> tuple[int, SYMMETRY]:
+    """
+    Return the canonical packed 4x4 board and the symmetry transforming into it,
+    i.e. transform_packed(board, symmetry) equals the canonical board.
+    """
+
+    result = board
+    result_symmetry = SYMMETRY.IDENTITY
+    for symmetry in SYMMETRY:
+        variant = transform_packed(board, symmetry)
+        if variant < result:
+            result = variant
+            result_symmetry = symmetry
+    return result, result_symmetry
@@ -0,0 +1,74 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+Tests of dirty rendering: the display built from the dirty rects only
+should always be the same as the full redraw of the screen.
+"""
+
+
+# System imports
+import os
+from pathlib import Path
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# External imports
+import pygame as pg
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# --- Fixtures ----------------------------------------------------------------
+
+class ShadowDisplay:
+    """Copy of the display, updated by pg.display.flip/update as the real one."""
+
+    def __init__(self, monkeypatch):
+        self.surface = None
+        monkeypatch.setattr(pg.display, 'flip', self.flip)
+        monkeypatch.setattr(pg.display, 'update', self.update)
+
+    def flip(self):
+        self.surface = pg.display.get_surface().copy()
+
+    def update(self, rects=None):
+        screen = pg.display.get_surface()
+        if rects is None or self.surface is None:
+            self.flip()
+            return
+        for rect in rects:
+            self.surface.blit(screen, rect, rect)
+
+    def differs(self) -> int:
+        """Number of pixels differing from the full redraw (the screen surface)."""
+        screen = pg.surfarray.pixels3d(pg.display.get_surface())
+        shadow = pg.surfarray.pixels3d(self.surface)
+        return int((screen != shadow).any(axis=2).sum())
+
+
+@pytest.fixture
+def demo(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.syspath_prepend(str(ROOT))
+    from demo import Demo
+    return Demo()
+
+
+# --- Tests -------------------------------------------------------------------
+
+def test_dirty_rects_match_full_redraw(demo, monkeypatch):
+    shadow = ShadowDisplay(monkeypatch)
+    demo.is_pause = False  # autoplay: moves, score, undo button and animation
+
+    for frame in range(120):
+        if not demo.loop_handler():
+            break
+        demo.events_handler()
+        demo.actions_handler()
+        demo.graphics_handler()
+        assert shadow.differs() == 0, f"frame {frame}"
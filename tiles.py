@@ -9,234 +9,266 @@ Logic, primary purpose and calculations.
 """
 
 
+# System imports
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
 # External imports
+import numpy as np
 from numpy import sin, pi
 
 # Project imports
-from config import GAME, TILE, GRID, ANIMATION, MOVE, PHASE
-
-
-# --- Tile --------------------------------------------------------------------
-
-class Tile:
-    """Tile object for animation."""
+from config import TILE, GRID, ANIMATION, MOVE, PHASE
+from config import setting_up_the_display
 
-    def __init__(
-            self,
-            row: int, col: int,
-            value: int,
-            moving = False,
-            arising = False
-    ):
-        """
-        Tile object for animation.
-
-        :param value: value from the appropriate self.matrix[row, col] cell
-        :param row: starting row in the grid for the tile
-        :param col: starting column in the grid for the tile
-        :param moving: flag: is this tile going to move or not?
-        :param arising: flag: is it newly appeared tile or not?
-        """
 
-        # starting cell in the grid for the tile
-        self.row, self.col = row, col
-        # destination cell in the grid for the moving tile
-        self.row_to, self.col_to = row, col
+# --- Constants ---------------------------------------------------------------
 
-        # corresponding value as base for power of '2'
-        self.value = value
+# attributes of tiles, stored as arrays in Tiles
+ARRAYS = (
+    'row', 'col', 'row_to', 'col_to', 'value', 'distance',
+    'x', 'y', 'x_from', 'y_from', 'scale',
+    'used', 'moving', 'arising', 'show',
+)
 
-        # marking corresponding animation phases
-        self.moving = moving
-        self.arising = arising
+# direction (dx, dy) of the coords change for moving tiles
+DIRECTIONS = {
+    MOVE.UP: (0, -1),
+    MOVE.DOWN: (0, 1),
+    MOVE.RIGHT: (1, 0),
+    MOVE.LEFT: (-1, 0),
+}
 
-        # number of rows or columns needed to move during moving phase
-        self.distance = 0
 
-        # graphics coords [x, y] of the tile related to GRID position
-        # change during moving animation phase
-        self.x = self.x_from = 0
-        self.y = self.y_from = 0
+# --- MovePlan ----------------------------------------------------------------
 
-        # graphics resize multiplier of the tile surface on the GRID
-        # changes during arising animation phase
-        self.scale = 1
+class MovePlan(NamedTuple):
+    """
+    Plan of the move emitted by the engine, in the screen orientation,
+    for Tiles to build animation from.
+    """
 
-        # visibility flag for tile
-        self.show = not arising
+    move: MOVE
+    # (row, col, row_to, col_to) of every moving tile
+    moves: list[tuple[int, int, int, int]]
+    # (row, col, value) of every tile arising after merge
+    arisings: list[tuple[int, int, int]]
 
 
 # --- Tiles -------------------------------------------------------------------
 
 class Tiles:
-    """Alternative way of representing grid of tiles, using tile objects."""
+    """
+    Alternative way of representing grid of tiles for animation.
+    Tiles are stored as structure of arrays, one slot of each array per tile,
+    so every animation frame is calculated for all the tiles at once.
+    """
 
     def __init__(self, rows: int, cols: int):
 
+        # tiles coords depend on the display
+        setting_up_the_display()
+
         # defining the "matrix" of tiles
         self.rows, self.cols = rows, cols
-        self.tiles: list[Tile] = list()
 
-        # defining current state of animation
+        # defining the arrays of tile attributes, one slot per tile
+        # (capacity is doubled on demand, see _grow)
+        capacity = 2 * rows * cols
+        # starting and destination cells in the grid for the tile
+        self.row = np.zeros(capacity, dtype=np.int32)
+        self.col = np.zeros(capacity, dtype=np.int32)
+        self.row_to = np.zeros(capacity, dtype=np.int32)
+        self.col_to = np.zeros(capacity, dtype=np.int32)
+        # corresponding value as base for power of '2'
+        self.value = np.zeros(capacity, dtype=np.int32)
+        # number of rows or columns needed to move during moving phase
+        self.distance = np.zeros(capacity, dtype=np.int32)
+        # graphics coords [x, y] of the tile related to GRID position,
+        # change during moving animation phase
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.x_from = np.zeros(capacity, dtype=np.int32)
+        self.y_from = np.zeros(capacity, dtype=np.int32)
+        # graphics resize multiplier of the tile surface on the GRID,
+        # changes during arising animation phase
+        self.scale = np.ones(capacity, dtype=np.float64)
+        # flags: occupied slot, animation phases and visibility
+        self.used = np.zeros(capacity, dtype=bool)
+        self.moving = np.zeros(capacity, dtype=bool)
+        self.arising = np.zeros(capacity, dtype=bool)
+        self.show = np.zeros(capacity, dtype=bool)
+
+        # free slots, the lowest ones are taken first
+        self.free = list(range(capacity - 1, -1, -1))
+
+        # flag of any changes of tiles apart from animation frames,
+        # reset by Graphics once the tiles are redrawn
+        self.is_changed = True
+
+        # registry of tile slots by their current cells
+        self.ids_from: defaultdict[tuple[int, int], set[int]] = defaultdict(set)
+
+        # defining current state of animation:
+        # time (in seconds) elapsed since the start of the current phase
         self.move = MOVE.NONE
         self.phase = PHASE.FINISH
-        self.frame = 0
-
-        # fpp - frames per phase.
-        self.fpp_moving = int(ANIMATION.TIME_MOVING * ANIMATION.FPS)
-        self.fpp_arising = int(ANIMATION.TIME_ARISING * ANIMATION.FPS)
+        self.elapsed = 0.0
 
-        # lists of corresponding changes in animated frames
-        self.moving_coords = self._precalculate_fpp_moving_coords()
-        self.arising_scales = self._precalculate_fpp_arising_scales()
+    def _grow(self):
+        """Doubling capacity of the arrays of tile attributes."""
+        capacity = self.used.size
+        for name in ARRAYS:
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate((array, np.zeros_like(array))))
+        self.free = list(range(2 * capacity - 1, capacity - 1, -1)) + self.free
 
-    # --- Pre-calculation methods ---------------------------------------------
+    # --- Interpolation methods -----------------------------------------------
 
     @staticmethod
-    def _precalculate_function(arg: float, a = 0.0) -> float:
+    def _ease(arg, a = 0.0):
         """
-        :param arg: must be in a range: 0.0 <= arg <= 1.0
+        :param arg: must be in a range: 0.0 <= arg <= 1.0 (number or array)
         :param a: must be in a range: 0.0 <= a <= 1.0
         :return: value in a range: a <= return <= 1.0
         """
         return a + (1 - a) * sin(arg * pi / 2) ** 2
 
-    def _precalculate_fpp_moving_coords(self) -> dict[int, list[int]]:
-        """
-        Precalculating sequence of delta coords for all the distances,
-        needed for moving phase of animation, using specific function.
-        """
-
-        result = dict()
+    def _interpolate_moving(self, progress: float):
+        """Coords of moving tiles at the progress (0.0 - 1.0) of moving phase."""
+        moving = np.flatnonzero(self.moving)
+        lengths = self.distance[moving] * (TILE.SIZE + TILE.PADDING)
+        shifts = (lengths * self._ease(progress)).astype(np.int32)
+        dx, dy = DIRECTIONS[self.move]
+        self.x[moving] = self.x_from[moving] + dx * shifts
+        self.y[moving] = self.y_from[moving] + dy * shifts
 
-        max_distance = max(GAME.ROWS, GAME.COLS)
-        for distance in range(1, max_distance):
-            length = distance * (TILE.SIZE + TILE.PADDING)
-            coords = [
-                int(length * self._precalculate_function(i / self.fpp_moving))
-                for i in range(self.fpp_moving)
-            ]
-            result[distance] = coords
-
-        return result
-
-    def _precalculate_fpp_arising_scales(self) -> list[float]:
+    def _interpolate_arising(self, progress: float):
         """
-        Precalculating sequence of scale multipliers,
-        needed for arising phase of animation, using specific function.
+        Scale of arising tiles at the progress (0.0 - 1.0) of arising phase,
+        rounded to the step to keep the number of scaled surfaces bounded.
         """
-
-        scales = [
-            self._precalculate_function(i / self.fpp_arising, 0.5)
-            for i in range(self.fpp_arising)
-        ]
-
-        return scales
+        scale = self._ease(progress, 0.5)
+        self.scale[self.arising] = round(scale / ANIMATION.SCALE_STEP) * ANIMATION.SCALE_STEP
 
     # --- Operational methods -------------------------------------------------
 
-    # def _find_index(self, row: int, col: int) -> int:
-    #     # first we search in the destination ('_to') tile-attributes
-    #     for index, tile in enumerate(self.tiles):
-    #         if tile.row_to == row and tile.col_to == col:
-    #             return index
-    #     # second we search in the current tile-attributes
-    #     for index, tile in enumerate(self.tiles):
-    #         if tile.row == row and tile.col == col:
-    #             return index
-    #     # otherwise it's an exception
-    #     raise LookupError(f"Can't find any tile on position: {row=}, {col=}")
-
-    def _find_indexes(self, row: int, col: int) -> list[int]:
-        result = []
-        # first we search in the destination ('_to') tile-attributes
-        for index, tile in enumerate(self.tiles):
-            if tile.row_to == row and tile.col_to == col:
-                result.append(index)
-        if not result:
-            # second we search in the current tile-attributes
-            for index, tile in enumerate(self.tiles):
-                if tile.row == row and tile.col == col:
-                    result.append(index)
-        if not result:
-            # if we didn't found anything - it's an exception
-            raise LookupError(f"Can't find any tile on position: {row=}, {col=}")
-        return result
-
-    # def get_tile(self, row: int, col: int) -> Tile:
-    #     return self.tiles[self._find_index(row, col)]
-    #
-    # def set_tile(self, row: int, col: int, tile: Tile):
-    #     self.tiles[self._find_index(row, col)] = tile
-    #
-    # def get_value(self, row: int, col: int) -> int:
-    #     return self.tiles[self._find_index(row, col)].value
-    #
-    # def set_value(self, row: int, col: int, value: int):
-    #     self.tiles[self._find_index(row, col)].value = value
+    def _register(self, index: int):
+        self.ids_from[int(self.row[index]), int(self.col[index])].add(index)
+
+    def _reregister(self):
+        """Rebuilding the registry after all tiles have changed their cells."""
+        self.ids_from.clear()
+        for index in np.flatnonzero(self.used).tolist():
+            self._register(index)
+
+    def _add_tile(self, row: int, col: int, value: int, arising: bool) -> int:
+        """Occupying free slot by the tile. Return index of the slot."""
+
+        if not self.free:
+            self._grow()
+        index = self.free.pop()
+
+        self.row[index] = self.row_to[index] = row
+        self.col[index] = self.col_to[index] = col
+        self.value[index] = value
+        self.distance[index] = 0
+        self.scale[index] = 1.0
+        self.used[index] = True
+        self.moving[index] = False
+        self.arising[index] = arising
+        self.show[index] = not arising
+
+        self._register(index)
+        self.is_changed = True
+        return index
+
+    def _remove_tile(self, index: int):
+        self.ids_from[int(self.row[index]), int(self.col[index])].discard(index)
+        self.used[index] = self.moving[index] = self.arising[index] = self.show[index] = False
+        self.free.append(index)
 
     def clear_tiles(self):
-        self.tiles.clear()
+        self.used[:] = self.moving[:] = self.arising[:] = self.show[:] = False
+        self.free = list(range(self.used.size - 1, -1, -1))
+        self.ids_from.clear()
+        self.is_changed = True
 
     def new_tile(self, row: int, col: int, value: int):
-        self.tiles.append(Tile(row, col, value))
-        self._actualize_coords(len(self.tiles) - 1)
+        index = self._add_tile(row, col, value, arising=False)
+        self._actualize_coords(index)
 
     def arise_tile(self, row: int, col: int, value: int):
-        self.tiles.append(Tile(row, col, value, arising=True))
-
-    def move_tile(self, row: int, col: int, row_to: int, col_to: int):
-        indexes = self._find_indexes(row, col)
-        for index in indexes:
-            self.tiles[index].row_to = row_to
-            self.tiles[index].col_to = col_to
-            self.tiles[index].moving = True
+        self._add_tile(row, col, value, arising=True)
 
     def copy_from_matrix(self, matrix):
         self.clear_tiles()
-        for row in range(self.rows):
-            for col in range(self.cols):
-                if matrix[row, col]:
-                    self.new_tile(row, col, int(matrix[row, col]))
+        rows, cols = np.nonzero(matrix)
+        while rows.size > self.used.size:
+            self._grow()
+
+        # filling the lowest slots at once
+        index = np.arange(rows.size)
+        self.row[index] = self.row_to[index] = rows
+        self.col[index] = self.col_to[index] = cols
+        self.value[index] = matrix[rows, cols]
+        self.distance[index] = 0
+        self.scale[index] = 1.0
+        self.used[index] = self.show[index] = True
+        self.free = list(range(self.used.size - 1, rows.size - 1, -1))
+
+        self._reregister()
+        self._actualize_coords(index)
 
     def set_move(self, move: MOVE):
         self.move = move
 
-    def fliplr(self):
-        for tile in self.tiles:
-            tile.col = (self.cols - 1) - tile.col
-            tile.col_to = (self.cols - 1) - tile.col_to
+    def set_plan(self, matrix, plan: MovePlan):
+        """
+        Preparing tiles for animation of the move by its plan,
+        starting from the matrix before the move.
+        """
+
+        self.copy_from_matrix(matrix)
+        self.set_move(plan.move)
+
+        if plan.moves:
+            # slots are filled by copy_from_matrix in the order of cells
+            slots = np.full(matrix.shape, -1)
+            slots[matrix != 0] = np.arange(self.used.sum())
+
+            rows, cols, rows_to, cols_to = np.array(plan.moves).T
+            index = slots[rows, cols]
+            self.row_to[index] = rows_to
+            self.col_to[index] = cols_to
+            self.moving[index] = True
 
-    def transpose(self):
-        self.rows, self.cols = self.cols, self.rows
-        for tile in self.tiles:
-            tile.row, tile.col = tile.col, tile.row
-            tile.row_to, tile.col_to = tile.col_to, tile.row_to
+        for row, col, value in plan.arisings:
+            self.arise_tile(row, col, value)
 
     # --- Animation methods ---------------------------------------------------
 
     def _reset_phase(self):
         self.phase = PHASE.MOVING
-        self.frame = 0
+        self.elapsed = 0.0
 
     def _next_phase(self):
         if self.phase == PHASE.MOVING:
             self.phase = PHASE.ARISING
         elif self.phase == PHASE.ARISING:
             self.phase = PHASE.FINISH
-        self.frame = 0
 
-    def _actualize_coords(self, index: int):
+    def _actualize_coords(self, index):
         """
-        Calculating coords [x, y] for the tile by index
-        according to it's row & column.
+        Calculating coords [x, y] for the tiles by index (or array of indexes)
+        according to their rows & columns.
         """
-        self.tiles[index].x = self.tiles[index].x_from = \
+        self.x[index] = self.x_from[index] = \
             GRID.X_TOP_LEFT + TILE.PADDING + TILE.SIZE // 2 + \
-            self.tiles[index].col * (TILE.SIZE + TILE.PADDING)
-        self.tiles[index].y = self.tiles[index].y_from = \
+            self.col[index] * (TILE.SIZE + TILE.PADDING)
+        self.y[index] = self.y_from[index] = \
             GRID.Y_TOP_LEFT + TILE.PADDING + TILE.SIZE // 2 + \
-            self.tiles[index].row * (TILE.SIZE + TILE.PADDING)
+            self.row[index] * (TILE.SIZE + TILE.PADDING)
 
     def _finish_moving(self):
         """
@@ -244,43 +276,30 @@ class Tiles:
         to static picture after moving phase.
         """
 
-        for index, tile in enumerate(self.tiles):
-
-            if tile.moving:
-                # actualizing cells in the grid for the tile
-                tile.row = tile.row_to
-                tile.col = tile.col_to
-                tile.distance = 0
-
-                self._actualize_coords(index)
-
-                # disabling moving flag once it is done
-                tile.moving = False
-
-            # restoring visibility for arising tiles
-            if tile.arising:
-                tile.show = True
-                tile.scale = 0
-
-        # looking for overlapping tiles,
+        # actualizing cells in the grid for the moving tiles
+        moving = np.flatnonzero(self.moving)
+        for index in moving.tolist():
+            self.ids_from[int(self.row[index]), int(self.col[index])].discard(index)
+            self.ids_from[int(self.row_to[index]), int(self.col_to[index])].add(index)
+        self.row[moving] = self.row_to[moving]
+        self.col[moving] = self.col_to[moving]
+        self.distance[moving] = 0
+        self._actualize_coords(moving)
+
+        # disabling moving flag once it is done
+        self.moving[moving] = False
+
+        # restoring visibility for arising tiles
+        arising = np.flatnonzero(self.arising)
+        self.show[arising] = True
+        self.scale[arising] = 0
+
+        # deleting overlapping tiles,
         # which always should be under arising tiles
-        overlapping_cells: list[tuple[int, int]] = []
-        for tile in self.tiles:
-            if tile.arising:
-                overlapping_cells.append((tile.row, tile.col))
-
-        # retrieving indexes of overlapping tiles to delete
-        overlapping_indexes: list[int] = []
-        for index, tile in enumerate(self.tiles):
-            if not tile.arising:
-                if (tile.row, tile.col) in overlapping_cells:
-                    overlapping_indexes.append(index)
-        overlapping_indexes.reverse()
-
-        # deleting overlapping tiles by indexes
-        if overlapping_indexes:
-            for index in overlapping_indexes:
-                self.tiles.pop(index)
+        for cell in zip(self.row[arising].tolist(), self.col[arising].tolist()):
+            for index in list(self.ids_from[cell]):
+                if not self.arising[index]:
+                    self._remove_tile(index)
 
     def _finish_arising(self):
         """
@@ -288,76 +307,71 @@ class Tiles:
         to static picture after arising phase.
         """
 
-        # Step 2: finalizing other attributes
-        for tile in self.tiles:
-            if tile.arising:
-                tile.scale = 1
-                # disabling arising flag once it is done
-                tile.arising = False
+        self.scale[self.arising] = 1
+        # disabling arising flag once it is done
+        self.arising[:] = False
 
     def start_animation(self):
         """Starting new animation procedure."""
 
-        self._reset_phase()
+        if self.move not in DIRECTIONS:
+            raise ValueError(f"Unexpected move value: {self.move}")
 
-        for index, tile in enumerate(self.tiles):
+        self._reset_phase()
 
-            # calculating distances for moving tiles
-            if tile.moving:
-                if self.move == MOVE.UP:
-                    tile.distance = tile.row - tile.row_to
-                elif self.move == MOVE.DOWN:
-                    tile.distance = tile.row_to - tile.row
-                elif self.move == MOVE.RIGHT:
-                    tile.distance = tile.col_to - tile.col
-                elif self.move == MOVE.LEFT:
-                    tile.distance = tile.col - tile.col_to
-                else:
-                    raise ValueError(f"Unexpected move value: {self.move}")
+        # calculating distances for moving tiles
+        moving = np.flatnonzero(self.moving)
+        self.distance[moving] = \
+            np.abs(self.row_to[moving] - self.row[moving]) + \
+            np.abs(self.col_to[moving] - self.col[moving])
 
-            self._actualize_coords(index)
+        self._actualize_coords(np.flatnonzero(self.used))
+        self.is_changed = True
 
-        self.next_animation()
+        self.next_animation(0.0)
 
-    def next_animation(self):
-        """Performing the next animation slide."""
+    def next_animation(self, time_delta: Optional[float] = None):
+        """
+        Performing the next animation slide, after the time_delta (in seconds)
+        passed since the previous one, single frame by ANIMATION.FPS if None.
+        Phases which are over by the time are finished without their frames.
+        """
 
         # Step 1: skipping if animation was already finished
         if self.phase == PHASE.FINISH:
             return
 
-        # Step 2: moving phase of animation
+        # Step 2: elapsed time of the current phase
+        if time_delta is None:
+            time_delta = 1 / ANIMATION.FPS
+        self.elapsed += time_delta
+
+        # Step 3: finishing the phases which are over, carrying the time left
+        if self.phase == PHASE.MOVING and self.elapsed >= ANIMATION.TIME_MOVING:
+            self.elapsed -= ANIMATION.TIME_MOVING
+            self._finish_moving()
+            self._next_phase()
+        if self.phase == PHASE.ARISING and self.elapsed >= ANIMATION.TIME_ARISING:
+            self.elapsed -= ANIMATION.TIME_ARISING
+            self._finish_arising()
+            self._next_phase()
+
+        # Step 4: interpolating the current phase by the elapsed time
         if self.phase == PHASE.MOVING:
-            for tile in self.tiles:
-                if tile.moving:
-                    if self.move == MOVE.UP:
-                        tile.y = tile.y_from - \
-                                 self.moving_coords[tile.distance][self.frame]
-                    elif self.move == MOVE.DOWN:
-                        tile.y = tile.y_from + \
-                                 self.moving_coords[tile.distance][self.frame]
-                    elif self.move == MOVE.RIGHT:
-                        tile.x = tile.x_from + \
-                                 self.moving_coords[tile.distance][self.frame]
-                    elif self.move == MOVE.LEFT:
-                        tile.x = tile.x_from - \
-                                 self.moving_coords[tile.distance][self.frame]
-                    else:
-                        raise ValueError(f"Unexpected move value: {self.move}")
-
-        # Step 3: arising phase of animation
+            self._interpolate_moving(self.elapsed / ANIMATION.TIME_MOVING)
         if self.phase == PHASE.ARISING:
-            for tile in self.tiles:
-                if tile.arising:
-                    tile.scale = self.arising_scales[self.frame]
+            self._interpolate_arising(self.elapsed / ANIMATION.TIME_ARISING)
+
+    def fast_forward(self):
+        """Finishing the animation at once, e.g. before the next move."""
 
-        # Step 4: next frame for further animation
-        self.frame += 1
+        if self.phase == PHASE.FINISH:
+            return
 
-        # Step 5: checking switch to the next phase
-        if self.phase == PHASE.MOVING and self.frame >= self.fpp_moving:
+        if self.phase == PHASE.MOVING:
             self._finish_moving()
             self._next_phase()
-        if self.phase == PHASE.ARISING and self.frame >= self.fpp_arising:
+        if self.phase == PHASE.ARISING:
             self._finish_arising()
             self._next_phase()
+        self.is_changed = True
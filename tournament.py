@@ -0,0 +1,177 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(V) Control level abstraction.
+Headless self-play tournament of AI players. Entry point.
+"""
+
+
+# System imports
+import argparse
+import json
+from multiprocessing import Pool
+from os import makedirs, path
+from time import perf_counter
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import GAME, AI, ENGINE, MOVE, ROLLOUT
+from logic import Logic
+from players import Player, RandomPlayer, GreedyPlayer, ExpectimaxPlayer, MonteCarloPlayer
+
+
+# --- Games -------------------------------------------------------------------
+
+POLICIES = ('random', 'greedy', 'expectimax', 'montecarlo')
+
+
+def create_player(policy: str, seed: np.random.SeedSequence, args: dict) -> Player:
+    if policy == 'random':
+        return RandomPlayer(seed)
+    elif policy == 'greedy':
+        return GreedyPlayer()
+    elif policy == 'expectimax':
+        return ExpectimaxPlayer(args['depth'], args['time_budget'])
+    elif policy == 'montecarlo':
+        return MonteCarloPlayer(
+            rollouts = args['rollouts'],
+            depth = args['rollout_depth'],
+            policy = ROLLOUT[args['rollout_policy'].upper()],
+            time_budget = args['time_budget'],
+            seed = seed
+        )
+    else:
+        raise ValueError(f"Unexpected policy: {policy}")
+
+
+def setup_worker(rows: int, cols: int, engine: str):
+    """Game constants for each process of the pool."""
+    GAME.ROWS, GAME.COLS = rows, cols
+    GAME.ENGINE = ENGINE[engine.upper()]
+    GAME.UNDO = 0  # no undo needed in self-play
+
+
+def play_game(task: tuple[int, np.random.SeedSequence, dict]) -> dict:
+    """Playing single game till it is lost. Return summary of its Stats."""
+
+    number, seed, args = task
+    seed_logic, seed_player = seed.spawn(2)
+
+    logic = Logic(GAME, headless=True, seed=int(seed_logic.generate_state(1)[0]))
+    player = create_player(args['policy'], seed_player, args)
+    if args['record']:
+        logic.start_recording(path.join(args['record'], f'game_{number:06d}.bin'))
+
+    while True:
+        move = player.choose_move(logic)
+        if logic.move(move) == MOVE.NONE:
+            break  # no possible moves: game is lost
+        logic.generate_new_tile(logic.choose_tile())
+    logic.stop_recording()
+
+    stats = logic.stats
+    merged = [power for power, count in stats.merge.items() if count]
+
+    return {
+        'score': stats.score,
+        'max_tile': 2 ** max(merged, default=int(logic.matrix.max())),
+        'moves': sum(stats.move.values()),
+        'moves_idle': stats.moves_idle,
+    }
+
+
+# --- Summary -----------------------------------------------------------------
+
+def summarize(results: list[dict], seconds: float) -> dict:
+    """Aggregating summaries of all the games."""
+
+    scores = np.array([result['score'] for result in results])
+    moves = np.array([result['moves'] for result in results])
+    moves_idle = np.array([result['moves_idle'] for result in results])
+
+    max_tiles: dict[int, int] = {}
+    for result in results:
+        max_tiles[result['max_tile']] = max_tiles.get(result['max_tile'], 0) + 1
+
+    return {
+        'games': len(results),
+        'seconds': round(seconds, 3),
+        'games_per_second': round(len(results) / seconds, 3) if seconds else None,
+        'score': {
+            'mean': float(scores.mean()),
+            'std': float(scores.std()),
+            'min': int(scores.min()),
+            'p25': float(np.percentile(scores, 25)),
+            'p50': float(np.percentile(scores, 50)),
+            'p75': float(np.percentile(scores, 75)),
+            'max': int(scores.max()),
+        },
+        'max_tile': dict(sorted(max_tiles.items())),
+        'moves_per_game': float(moves.mean()),
+        'moves_idle_per_game': float(moves_idle.mean()),
+    }
+
+
+def run_tournament(args: dict) -> dict:
+    """Playing all the games across the pool of processes."""
+
+    seeds = np.random.SeedSequence(args['seed']).spawn(args['games'])
+    tasks = [(number, seed, args) for number, seed in enumerate(seeds)]
+    if args['record']:
+        makedirs(args['record'], exist_ok=True)
+
+    start = perf_counter()
+    with Pool(
+            processes = args['processes'],
+            initializer = setup_worker,
+            initargs = (args['rows'], args['cols'], args['engine'])
+    ) as pool:
+        results = list(pool.imap_unordered(play_game, tasks, chunksize=args['chunksize']))
+
+    return summarize(results, perf_counter() - start)
+
+
+# --- Main Program ------------------------------------------------------------
+
+def parse_args() -> dict:
+    parser = argparse.ArgumentParser(description='Headless self-play tournament of AI players.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--policy', choices=POLICIES, default='greedy', help='AI player')
+    parser.add_argument('--processes', type=int, default=None, help='pool size, all CPUs by default')
+    parser.add_argument('--chunksize', type=int, default=1, help='games sent to process at once')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the whole tournament')
+    parser.add_argument('--rows', type=int, default=GAME.ROWS, help='rows of the grid')
+    parser.add_argument('--cols', type=int, default=GAME.COLS, help='columns of the grid')
+    parser.add_argument('--engine', choices=[engine.name.lower() for engine in ENGINE],
+                        default=GAME.ENGINE.name.lower(), help='engine performing the moves')
+    parser.add_argument('--depth', type=int, default=AI.DEPTH, help='expectimax search depth')
+    parser.add_argument('--time-budget', type=float, default=AI.TIME_BUDGET,
+                        help='expectimax and montecarlo time budget per move in seconds')
+    parser.add_argument('--rollouts', type=int, default=AI.ROLLOUTS,
+                        help='montecarlo largest number of playouts per move')
+    parser.add_argument('--rollout-depth', type=int, default=AI.ROLLOUT_DEPTH,
+                        help='montecarlo playout depth in moves')
+    parser.add_argument('--rollout-policy', choices=[policy.name.lower() for policy in ROLLOUT],
+                        default=AI.ROLLOUT_POLICY.name.lower(), help='montecarlo playout policy')
+    parser.add_argument('--record', default=None, help='directory to record binary logs of games to')
+    parser.add_argument('--json', default=None, help='file to save the summary to')
+    return vars(parser.parse_args())
+
+
+def main():
+    args = parse_args()
+    summary = run_tournament(args)
+
+    print(json.dumps(summary, indent=4))
+    if args['json']:
+        with open(args['json'], 'w') as json_file:
+            json.dump(summary, json_file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
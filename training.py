@@ -0,0 +1,117 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(V) Control level abstraction.
+TD(0) self-play training of N-tuple network with checkpoints. Entry point.
+"""
+
+
+# System imports
+import argparse
+import json
+from os import path
+from time import perf_counter
+
+# External imports
+import numpy as np
+
+# Project imports
+from config import GAME, NTUPLE, ENGINE, MOVE
+from logic import Logic
+from ntuple import NTupleNetwork
+
+
+# --- Training ----------------------------------------------------------------
+
+def play_game(logic: Logic, network: NTupleNetwork, learning_rate: float):
+    """
+    Playing single game by the network till it is lost, learning on the way:
+    value of each board after the move (afterstate) is moved towards
+    the score and value of the next afterstate, towards 0 once the game is lost.
+    """
+
+    logic.new_game()
+    features = None  # features of the previous afterstate
+    while True:
+        move, afterstate, score = network.choose_move(logic.matrix)
+
+        target = 0.0 if move == MOVE.NONE else score + network.value(afterstate)
+        if features is not None:
+            network.update(features, target - network.weights[features].sum(dtype=np.float64), learning_rate)
+        if move == MOVE.NONE:
+            break  # no possible moves: game is lost
+
+        features = network.features(afterstate[None])[0]
+        logic.move(move)
+        logic.generate_new_tile(logic.choose_tile())
+
+
+def create_network(args: dict) -> NTupleNetwork:
+    """Network with the weights from the file to continue training, zeros if none."""
+    network = NTupleNetwork(args['rows'], args['cols'])
+    if path.exists(args['weights']):
+        network.weights[:] = NTupleNetwork.load(args['weights'], args['rows'], args['cols']).weights
+    return network
+
+
+def train(args: dict):
+    """Training by the games one after another, saving the weights by checkpoints."""
+
+    GAME.ROWS, GAME.COLS = args['rows'], args['cols']
+    GAME.ENGINE = ENGINE[args['engine'].upper()]
+    GAME.UNDO = 0  # no undo needed in self-play
+
+    network = create_network(args)
+    logic = Logic(GAME, headless=True, seed=args['seed'])
+
+    scores = []
+    max_tiles = []
+    start = perf_counter()
+    for game in range(1, args['games'] + 1):
+        play_game(logic, network, args['learning_rate'])
+        scores.append(logic.stats.score)
+        max_tiles.append(2 ** int(logic.matrix.max()))
+
+        if game % args['checkpoint_games'] == 0 or game == args['games']:
+            network.save(args['weights'])
+            print(json.dumps({
+                'games': game,
+                'seconds': round(perf_counter() - start, 3),
+                'score_mean': float(np.mean(scores)),
+                'score_max': int(np.max(scores)),
+                'max_tile': int(np.max(max_tiles)),
+                'rate_2048': float(np.mean(np.array(max_tiles) >= 2048)),
+            }))
+            scores.clear()
+            max_tiles.clear()
+
+
+# --- Main Program ------------------------------------------------------------
+
+def parse_args() -> dict:
+    parser = argparse.ArgumentParser(description='TD(0) self-play training of N-tuple network.')
+    parser.add_argument('--games', type=int, default=10 * NTUPLE.CHECKPOINT_GAMES,
+                        help='number of games to play')
+    parser.add_argument('--weights', default=NTUPLE.WEIGHTS_FILE,
+                        help='.npy file of the weights, continued if exists')
+    parser.add_argument('--checkpoint-games', type=int, default=NTUPLE.CHECKPOINT_GAMES,
+                        help='weights are saved once per this number of games')
+    parser.add_argument('--learning-rate', type=float, default=NTUPLE.LEARNING_RATE,
+                        help='TD(0) step size')
+    parser.add_argument('--seed', type=int, default=None, help='seed of new tiles')
+    parser.add_argument('--rows', type=int, default=GAME.ROWS, help='rows of the grid')
+    parser.add_argument('--cols', type=int, default=GAME.COLS, help='columns of the grid')
+    parser.add_argument('--engine', choices=[engine.name.lower() for engine in ENGINE],
+                        default=GAME.ENGINE.name.lower(), help='engine performing the moves')
+    return vars(parser.parse_args())
+
+
+def main():
+    train(parse_args())
+
+
+if __name__ == '__main__':
+    main()
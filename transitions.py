@@ -0,0 +1,150 @@
+# -----------------------------------------------------------------------------
+# "2048" tribute to original https://2048game.com
+# Copyright (c) Dec 2021 Oleksii Hurov
+# -----------------------------------------------------------------------------
+
+"""
+(III) Logic level abstraction.
+Precalculated transitions of the single row of the grid for any grid width.
+"""
+
+
+# System imports
+from functools import lru_cache
+from itertools import product
+from typing import Callable, NamedTuple
+
+
+# --- Constants ---------------------------------------------------------------
+
+# the largest number of all possible rows to be precalculated eagerly
+# default value: 2 ** 16 = 65_536 (e.g. grids up to 3x3 with all their powers)
+EAGER_LIMIT = 2 ** 16
+
+# the largest number of rows kept in the lazily calculated tables
+LRU_SIZE = 2 ** 16
+
+
+# --- Transition --------------------------------------------------------------
+
+class Transition(NamedTuple):
+    """Result of sliding of the single row, as precalculated."""
+
+    # resulting row of powers
+    row: tuple[int, ...]
+    # score gained by merges
+    score: int
+    # powers of 2 of the merged tiles
+    merges: tuple[int, ...]
+    # (column, power) of every tile arising after merge
+    arisings: tuple[tuple[int, int], ...]
+    # (column, column_to) of every moving tile,
+    # listed starting from the border they are moving to,
+    # so no tile is moved into a cell which is not yet vacated
+    moves: tuple[tuple[int, int], ...]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.moves)
+
+
+def slide_row(cells: tuple[int, ...]) -> tuple[tuple[int, ...], int, tuple, tuple[int, ...]]:
+    """
+    Slide one row of powers to the left: compress → merge → compress.
+    Return resulting row, score gained, (column, power) of merged tiles
+    and destination column for each source column (-1 for empty cells).
+    """
+
+    result: list[int] = []
+    merges: list[tuple[int, int]] = []
+    destinations: list[int] = []
+    score = 0
+    is_mergeable = False  # the last tile in result could accept a merge
+
+    for value in cells:
+        if not value:
+            destinations.append(-1)
+            continue
+        if is_mergeable and result[-1] == value:
+            result[-1] += 1
+            merges.append((len(result) - 1, result[-1]))
+            score += 2 ** result[-1]
+            is_mergeable = False
+        else:
+            result.append(value)
+            is_mergeable = True
+        destinations.append(len(result) - 1)
+
+    result += [0] * (len(cells) - len(result))
+
+    return tuple(result), score, tuple(merges), tuple(destinations)
+
+
+def transition_left(cells: tuple[int, ...]) -> Transition:
+    """Calculating transition of the row moving to the left."""
+
+    row, score, arisings, destinations = slide_row(cells)
+    moves = tuple(
+        (col, col_to) for col, col_to in enumerate(destinations)
+        if col_to >= 0 and col_to != col
+    )
+
+    return Transition(
+        row = row,
+        score = score,
+        merges = tuple(power for _, power in arisings),
+        arisings = arisings,
+        moves = moves
+    )
+
+
+def transition_right(cells: tuple[int, ...]) -> Transition:
+    """Calculating transition of the row moving to the right."""
+
+    last = len(cells) - 1
+    transition = transition_left(cells[::-1])
+
+    return Transition(
+        row = transition.row[::-1],
+        score = transition.score,
+        merges = transition.merges,
+        arisings = tuple((last - col, power) for col, power in transition.arisings),
+        moves = tuple((last - col, last - col_to) for col, col_to in transition.moves)
+    )
+
+
+# --- RowTransitions ----------------------------------------------------------
+
+class RowTransitions:
+    """
+    Tables of transitions for all the rows of the given width,
+    keyed by the tuple of powers in the row.
+    Calculated eagerly for narrow rows and lazily with LRU cache for wide ones.
+    """
+
+    def __init__(self, cols: int, max_power: int):
+        """
+        :param cols: number of cells in the row
+        :param max_power: the largest power which could appear in the row
+        """
+
+        self.cols = cols
+        self.max_power = max_power
+        self.is_eager = (max_power + 1) ** cols <= EAGER_LIMIT
+
+        self.left: Callable[[tuple[int, ...]], Transition]
+        self.right: Callable[[tuple[int, ...]], Transition]
+
+        if self.is_eager:
+            rows = list(product(range(max_power + 1), repeat=cols))
+            self.left = {cells: transition_left(cells) for cells in rows}.__getitem__
+            self.right = {cells: transition_right(cells) for cells in rows}.__getitem__
+        else:
+            self.left = lru_cache(maxsize=LRU_SIZE)(transition_left)
+            self.right = lru_cache(maxsize=LRU_SIZE)(transition_right)
+
+
+@lru_cache(maxsize=None)
+def get_row_transitions(cols: int, max_power: int) -> RowTransitions:
+    """Shared tables of transitions for the rows of the given width."""
+    return RowTransitions(cols, max_power)